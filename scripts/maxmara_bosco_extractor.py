@@ -16,14 +16,19 @@ from __future__ import annotations
 
 import argparse
 import csv
+import gzip
+import hashlib
+import http.client
 import json
+import os
 import re
-import subprocess
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Sequence, Tuple
-from urllib.parse import quote
+from urllib.parse import quote, urljoin, urlsplit
 
 
 UA = (
@@ -33,48 +38,147 @@ UA = (
 )
 
 
+WS_RE = re.compile(r"\s+")
+SCRIPT_RE = re.compile(r"<script[\s\S]*?</script>", re.IGNORECASE)
+STYLE_RE = re.compile(r"<style[\s\S]*?</style>", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^>]+>")
+SCRIPT_OR_STYLE_RE = re.compile(r"<(?:script|style)", re.IGNORECASE)
+# Color-code lists use "," or ";" interchangeably; fold to ";" and split without regex.
+CODE_SEP_TRANS = str.maketrans({",": ";"})
+
+
 def normalize_space(value: str) -> str:
-    return re.sub(r"\s+", " ", str(value or "")).strip()
+    return WS_RE.sub(" ", str(value or "")).strip()
 
 
 def strip_tags(value: str) -> str:
     # Minimal tag stripper good enough for Bosco HTML snippets.
-    v = re.sub(r"<script[\s\S]*?</script>", " ", value, flags=re.IGNORECASE)
-    v = re.sub(r"<style[\s\S]*?</style>", " ", v, flags=re.IGNORECASE)
-    v = re.sub(r"<[^>]+>", " ", v)
+    if "<" not in value:
+        return normalize_space(value)
+    v = SCRIPT_RE.sub(" ", value)
+    v = STYLE_RE.sub(" ", v)
+    v = TAG_RE.sub(" ", v)
     return normalize_space(v)
 
 
+def strip_inline_tags(value: str) -> str:
+    # Cheaper variant for short accordion spans: one tag pass unless a <script>/<style> block
+    # actually shows up, in which case fall back to the full stripper.
+    if "<" not in value:
+        return normalize_space(value)
+    if SCRIPT_OR_STYLE_RE.search(value):
+        return strip_tags(value)
+    return normalize_space(TAG_RE.sub(" ", value))
+
+
+# Deletes every whitespace character (NBSP included) and the ruble glyph in one pass.
+PRICE_TRANS = {cp: None for cp in range(0x3001) if chr(cp).isspace()}
+PRICE_TRANS[ord("₽")] = None
+
+
 def parse_rub_price(text: str) -> Optional[float]:
-    s = normalize_space(text)
+    s = str(text or "")
+    if "руб." in s:
+        s = s.replace("руб.", "")
+    s = s.translate(PRICE_TRANS)
     if not s:
         return None
-    s = s.replace("\xa0", " ").replace("₽", "").replace("руб.", "").strip()
-    s = s.replace(" ", "")
     try:
         return float(s)
     except Exception:
         return None
 
 
-def curl_get(url: str, timeout_s: int = 40, retries: int = 3, delay_s: float = 0.6) -> str:
+_MAX_REDIRECTS = 5
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# A reused keep-alive socket the server has meanwhile closed fails with one of these; that is
+# retried once on a fresh connection instead of costing an http_get attempt.
+_STALE_CONN_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+# One keep-alive connection per (thread, scheme, host): TCP/TLS handshakes are paid once per
+# host instead of once per request.
+_CONNECTIONS = threading.local()
+
+# Caps requests in flight across all worker threads (like a per-host connector limit), so the
+# style and page pools together never open more sockets to Bosco than configured.
+_IN_FLIGHT = threading.BoundedSemaphore(16)
+
+
+def set_max_connections(limit: int) -> None:
+    global _IN_FLIGHT
+    _IN_FLIGHT = threading.BoundedSemaphore(max(1, limit))
+
+
+def _connection(scheme: str, netloc: str, timeout_s: int) -> http.client.HTTPConnection:
+    pool: Optional[Dict[Tuple[str, str], http.client.HTTPConnection]] = getattr(_CONNECTIONS, "pool", None)
+    if pool is None:
+        pool = _CONNECTIONS.pool = {}
+    conn = pool.get((scheme, netloc))
+    if conn is None:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(netloc, timeout=timeout_s)
+        pool[(scheme, netloc)] = conn
+    return conn
+
+
+def _drop_connection(scheme: str, netloc: str) -> None:
+    pool = getattr(_CONNECTIONS, "pool", None) or {}
+    conn = pool.pop((scheme, netloc), None)
+    if conn is not None:
+        conn.close()
+
+
+def _fetch_once(url: str, timeout_s: int) -> str:
+    for _ in range(_MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        conn = _connection(parts.scheme, parts.netloc, timeout_s)
+        reused = conn.sock is not None
+        headers = {"User-Agent": UA, "Accept-Encoding": "gzip"}
+        try:
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+            except _STALE_CONN_ERRORS:
+                if not reused:
+                    raise
+                _drop_connection(parts.scheme, parts.netloc)
+                conn = _connection(parts.scheme, parts.netloc, timeout_s)
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+            body = resp.read()
+        except Exception:
+            _drop_connection(parts.scheme, parts.netloc)
+            raise
+        if resp.will_close:
+            _drop_connection(parts.scheme, parts.netloc)
+
+        if resp.status in _REDIRECT_STATUSES:
+            location = resp.getheader("Location")
+            if not location:
+                raise RuntimeError(f"HTTP {resp.status} without Location")
+            url = urljoin(url, location)
+            continue
+        if resp.status >= 400:
+            raise RuntimeError(f"HTTP {resp.status}")
+        if (resp.getheader("Content-Encoding") or "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return body.decode("utf-8", errors="replace")
+    raise RuntimeError("too many redirects")
+
+
+def http_get(url: str, timeout_s: int = 40, retries: int = 3, delay_s: float = 0.6) -> str:
     last_err: Optional[str] = None
     for attempt in range(1, retries + 1):
         try:
-            proc = subprocess.run(
-                ["curl", "-sS", "-L", "--max-time", str(timeout_s), "-A", UA, url],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            return proc.stdout.decode("utf-8", errors="replace")
-        except subprocess.CalledProcessError as exc:
-            last_err = (exc.stderr or b"").decode("utf-8", errors="replace")[:500]
+            with _IN_FLIGHT:
+                return _fetch_once(url, timeout_s)
+        except (OSError, http.client.HTTPException, RuntimeError) as exc:
+            last_err = str(exc)[:500]
             if attempt < retries:
                 time.sleep(delay_s * attempt)
                 continue
-            raise RuntimeError(f"curl failed: {url} :: {last_err}")
-    raise RuntimeError(f"curl failed: {url} :: {last_err}")
+    raise RuntimeError(f"fetch failed: {url} :: {last_err}")
 
 
 @dataclass(frozen=True)
@@ -84,6 +188,9 @@ class QueryTarget:
     base11: str
     color_code: Optional[str]
     query: str
+    # Upper-cased match keys, computed once so acceptance checks do not allocate per page.
+    expected_article_upper: str
+    base11_upper: str
 
 
 def build_queries_for_row(row: Dict[str, Any]) -> List[QueryTarget]:
@@ -98,12 +205,12 @@ def build_queries_for_row(row: Dict[str, Any]) -> List[QueryTarget]:
         if not c:
             continue
         # Some rows store "013; 015; 016" as a single string.
-        parts = [p.strip() for p in re.split(r"[;,]", c) if p.strip()]
+        parts = [p.strip() for p in c.translate(CODE_SEP_TRANS).split(";") if p.strip()]
         codes.extend(parts)
     # De-dup preserving order.
-    seen = set()
-    codes = [c for c in codes if not (c in seen or seen.add(c))]
+    codes = list(dict.fromkeys(codes))
 
+    base11_upper = base11.upper()
     out: List[QueryTarget] = []
     for code in codes:
         out.append(
@@ -113,6 +220,8 @@ def build_queries_for_row(row: Dict[str, Any]) -> List[QueryTarget]:
                 base11=base11,
                 color_code=code,
                 query=f"{base11}@{code}",
+                expected_article_upper=f"{base11}@{code}".upper(),
+                base11_upper=base11_upper,
             )
         )
     out.append(
@@ -122,6 +231,8 @@ def build_queries_for_row(row: Dict[str, Any]) -> List[QueryTarget]:
             base11=base11,
             color_code=None,
             query=base11,
+            expected_article_upper="",
+            base11_upper=base11_upper,
         )
     )
     return out
@@ -129,49 +240,61 @@ def build_queries_for_row(row: Dict[str, Any]) -> List[QueryTarget]:
 
 PRODUCT_SLUG_RE = re.compile(r'data-product-slug="(?P<slug>[^"]+)"')
 
-
-def parse_slugs_from_catalog_search(html: str) -> List[str]:
-    slugs: List[str] = []
-    seen = set()
-    for m in PRODUCT_SLUG_RE.finditer(html):
-        slug = m.group("slug")
-        if slug in seen:
-            continue
-        seen.add(slug)
-        slugs.append(slug)
-    return slugs
+# All single-tag product-page fields in one alternation, so the page is tokenized by a single scan
+# instead of one full pass per field. Alternatives are factored by their shared tag prefix so each
+# "<" is tried against a handful of branches only. Match.lastgroup names the matched field. The
+# branches sit in a lookahead, so a match consumes only its "<" and a field whose value spans
+# other tags cannot hide them from their own branch.
+PRODUCT_PAGE_RE = re.compile(
+    r"<(?=title>(?P<title>.*?)</title>"
+    r'|link[^>]+rel="canonical"[^>]+href="(?P<canonical>[^"]+)"'
+    r'|div class="product-card__(?:title-brand">\s*(?P<brand>.*?)\s*</div>'
+    r'|title-name">\s*(?P<name>.*?)\s*</div>'
+    r'|code">\s*Код:\s*(?P<code>[0-9]+)\s*</div>'
+    r'|price-item[^"]*product-card__price-item_current[^"]*">\s*(?P<price>.*?)\s*</div>)'
+    r'|span class="select-b__item-text">\s*(?P<size>[^<]+?)\s*</span>'
+    r'|meta[^>]+name="description"[^>]+content="(?P<meta_description>[^"]+)"'
+    r'|(?-i:img[^>]+src="(?P<image>https://staticv2\.bosco\.ru/media/[^"]+\.(?:jpg|jpeg|png|webp|JPG|JPEG|PNG|WEBP))"))',
+    re.IGNORECASE | re.DOTALL,
+)
+# Caption/text pairs keep their own scan: a caption's lazy match may run up to a later text span.
+DETAIL_PAIR_RE = re.compile(
+    r'<span class="details-a__item-caption">\s*(.*?)\s*</span>\s*<span class="details-a__item-text">\s*(.*?)\s*</span>',
+    re.IGNORECASE | re.DOTALL,
+)
+_SINGLE_FIELDS = ("title", "canonical", "brand", "name", "code", "price", "meta_description")
 
 
-def _extract_one(html: str, pattern: str) -> str:
-    m = re.search(pattern, html, flags=re.IGNORECASE | re.DOTALL)
-    return strip_tags(m.group(1)) if m else ""
+def parse_slugs_from_catalog_search(html: str) -> List[str]:
+    return list(dict.fromkeys(PRODUCT_SLUG_RE.findall(html)))
 
 
 def parse_bosco_product_page(url: str, html: str) -> Dict[str, Any]:
-    title = _extract_one(html, r"<title>(.*?)</title>")
-    canonical = _extract_one(html, r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"')
-
-    brand = _extract_one(html, r'<div class="product-card__title-brand">\s*(.*?)\s*</div>')
-    name = _extract_one(html, r'<div class="product-card__title-name">\s*(.*?)\s*</div>')
-
-    code = _extract_one(html, r'<div class="product-card__code">\s*Код:\s*([0-9]+)\s*</div>')
-
-    price_text = _extract_one(
-        html, r'<div class="product-card__price-item[^"]*product-card__price-item_current[^"]*">\s*(.*?)\s*</div>'
-    )
-    price = parse_rub_price(price_text)
+    first: Dict[str, str] = {}
+    size_values: List[str] = []
+    image_values: List[str] = []
+    for m in PRODUCT_PAGE_RE.finditer(html):
+        field = m.lastgroup
+        if field == "size":
+            size_values.append(m.group("size"))
+        elif field == "image":
+            image_values.append(m.group("image"))
+        elif field and field not in first:
+            first[field] = m.group(field)
+
+    single = {f: strip_tags(first[f]) if f in first else "" for f in _SINGLE_FIELDS}
+    title = single["title"]
+    canonical = single["canonical"]
+    brand = single["brand"]
+    name = single["name"]
+    code = single["code"]
+    price = parse_rub_price(single["price"])
 
     # Details: capture caption/text pairs (Описание + Состав и уход accordions).
-    details: Dict[str, str] = {}
-    for m in re.finditer(
-        r'<span class="details-a__item-caption">\s*(.*?)\s*</span>\s*<span class="details-a__item-text">\s*(.*?)\s*</span>',
-        html,
-        flags=re.IGNORECASE | re.DOTALL,
-    ):
-        cap = strip_tags(m.group(1)).rstrip(":").strip()
-        txt = strip_tags(m.group(2))
-        if cap and txt:
-            details[cap] = txt
+    cleaned_pairs = (
+        (strip_inline_tags(c).rstrip(":").strip(), strip_inline_tags(t)) for c, t in DETAIL_PAIR_RE.findall(html)
+    )
+    details: Dict[str, str] = {cap: txt for cap, txt in cleaned_pairs if cap and txt}
 
     article = details.get("Артикул") or details.get("Артикул") or ""
     made_in = details.get("Страна производства") or ""
@@ -179,30 +302,18 @@ def parse_bosco_product_page(url: str, html: str) -> Dict[str, Any]:
     composition = details.get("Состав") or ""
     care = details.get("Уход") or ""
 
-    meta_description = _extract_one(html, r'<meta[^>]+name="description"[^>]+content="([^"]+)"')
+    meta_description = single["meta_description"]
 
-    # Sizes list from radio labels.
-    sizes: List[str] = []
-    seen = set()
-    for m in re.finditer(r'<span class="select-b__item-text">\s*([^<]+?)\s*</span>', html, flags=re.IGNORECASE):
-        s = normalize_space(m.group(1))
-        if not s:
-            continue
-        k = s.upper()
-        if k in seen:
-            continue
-        seen.add(k)
-        sizes.append(s)
+    # Sizes list from radio labels; de-dup case-insensitively, the first spelling seen wins.
+    sizes_by_key: Dict[str, str] = {}
+    for raw in size_values:
+        s = normalize_space(raw)
+        if s:
+            sizes_by_key.setdefault(s.upper(), s)
+    sizes = list(sizes_by_key.values())
 
     # Images
-    img_urls: List[str] = []
-    seen_img = set()
-    for m in re.finditer(r'<img[^>]+src="(https://staticv2\.bosco\.ru/media/[^"]+\.(?:jpg|jpeg|png|webp|JPG|JPEG|PNG|WEBP))"', html):
-        u = m.group(1)
-        if u in seen_img:
-            continue
-        seen_img.add(u)
-        img_urls.append(u)
+    img_urls = list(dict.fromkeys(image_values))
 
     images: List[Dict[str, str]] = []
     for u in img_urls:
@@ -245,28 +356,164 @@ def parse_bosco_product_page(url: str, html: str) -> Dict[str, Any]:
 
 
 def should_accept_for_target(page: Dict[str, Any], target: QueryTarget) -> bool:
-    article = normalize_space(((page.get("bosco") or {}).get("article") or ""))
+    # Parsed articles come out of strip_tags, so they are already whitespace-normalized.
+    article = ((page.get("bosco") or {}).get("article") or "").upper()
     if not article:
         return False
     # Strong match when we have color-code.
     if target.color_code:
-        return article.upper() == f"{target.base11}@{target.color_code}".upper()
-    return article.upper().startswith(target.base11.upper())
+        return article == target.expected_article_upper
+    return article.startswith(target.base11_upper)
+
+
+_SD_DEFAULTS: Dict[str, Any] = {
+    "site": "multi",
+    "candidate_urls": [],
+    "candidate_urls_exact_color": [],
+    "candidate_urls_model_only": [],
+    "best_match": None,
+    "pages": [],
+}
 
 
 def ensure_site_data(row: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(row.get("site_data"), dict):
         row["site_data"] = {"site": "multi", "candidate_urls": [], "best_match": None, "pages": []}
     sd = row["site_data"]
-    sd.setdefault("site", "multi")
-    sd.setdefault("candidate_urls", [])
-    sd.setdefault("candidate_urls_exact_color", [])
-    sd.setdefault("candidate_urls_model_only", [])
-    sd.setdefault("best_match", None)
-    sd.setdefault("pages", [])
+    # Common case: a previous pipeline step already filled every key; one keys-view check.
+    if _SD_DEFAULTS.keys() <= sd.keys():
+        return sd
+    for key, default in _SD_DEFAULTS.items():
+        if key not in sd:
+            sd[key] = list(default) if isinstance(default, list) else default
     return sd
 
 
+# Styles sharing a commercial-style prefix issue identical searches and hit the same product
+# pages; memoize successful results for the lifetime of the run.
+_SEARCH_CACHE: Dict[str, List[str]] = {}
+_PRODUCT_CACHE: Dict[str, Dict[str, Any]] = {}
+
+# Optional process pool for page parsing (--parse-workers): the regex work holds the GIL, so
+# with many page fetchers in flight it is the part threads cannot overlap.
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def cached_http_get(url: str, args: argparse.Namespace) -> str:
+    # Optional on-disk response cache (--http-cache-dir) so reruns while debugging downstream
+    # steps do not hit the network again. Entries are gzip'ed HTML keyed by sha256(url).
+    timeout_s, retries, delay_s = args.timeout, args.retries, args.delay
+    if not args.http_cache_dir:
+        return http_get(url, timeout_s=timeout_s, retries=retries, delay_s=delay_s)
+    h = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    path = Path(args.http_cache_dir) / h[:2] / f"{h[2:]}.html.gz"
+    if path.exists():
+        return gzip.decompress(path.read_bytes()).decode("utf-8")
+    html = http_get(url, timeout_s=timeout_s, retries=retries, delay_s=delay_s)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(gzip.compress(html.encode("utf-8"), compresslevel=6))
+    os.replace(tmp, path)
+    return html
+
+
+def fetch_search_slugs(search_url: str, args: argparse.Namespace) -> List[str]:
+    slugs = _SEARCH_CACHE.get(search_url)
+    if slugs is None:
+        search_html = cached_http_get(search_url, args)
+        slugs = _SEARCH_CACHE.setdefault(search_url, parse_slugs_from_catalog_search(search_html))
+    return slugs
+
+
+def fetch_product_page(product_url: str, args: argparse.Namespace) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    cached = _PRODUCT_CACHE.get(product_url)
+    if cached is not None:
+        return cached, None
+    try:
+        product_html = cached_http_get(product_url, args)
+        if _PARSE_POOL is not None:
+            page = _PARSE_POOL.submit(parse_bosco_product_page, product_url, product_html).result()
+        else:
+            page = parse_bosco_product_page(product_url, product_html)
+        return _PRODUCT_CACHE.setdefault(product_url, page), None
+    except Exception as exc:
+        return None, f"product_failed:{product_url}:{exc}"
+
+
+def enrich_row(row: Dict[str, Any], args: argparse.Namespace, page_pool: ThreadPoolExecutor) -> Dict[str, Any]:
+    style = normalize_space(row.get("style", ""))
+    sd = ensure_site_data(row)
+    if not isinstance(sd.get("pages"), list):
+        sd["pages"] = list(sd.get("pages") or [])
+    pages_list: List[Any] = sd["pages"]
+    existing_urls = {p.get("url") for p in pages_list if isinstance(p, dict)}
+    before_pages = len(pages_list)
+
+    # If already matched somewhere, still try Bosco as an additional source (but don't spam).
+    targets = build_queries_for_row(row)
+
+    added_for_style: List[Dict[str, Any]] = []
+    tried_queries: List[str] = []
+    errors: List[str] = []
+    max_slugs = max(1, int(args.max_slugs))
+
+    for target in targets:
+        tried_queries.append(target.query)
+        q = quote(target.query, safe="")
+        search_url = f"https://v2.bosco.ru/catalog/?q={q}"
+        try:
+            slugs = fetch_search_slugs(search_url, args)[:max_slugs]
+        except Exception as exc:
+            errors.append(f"search_failed:{target.query}:{exc}")
+            continue
+
+        if not slugs:
+            continue
+
+        product_urls = [f"https://v2.bosco.ru/product/{slug.strip('/')}/" for slug in slugs]
+        fetched = page_pool.map(lambda u: fetch_product_page(u, args), product_urls)
+        for product_url, (page, err) in zip(product_urls, fetched):
+            if page is None:
+                errors.append(err or f"product_failed:{product_url}")
+                continue
+
+            if not should_accept_for_target(page, target):
+                continue
+
+            # Avoid duplicates by URL.
+            if page.get("url") in existing_urls:
+                continue
+
+            pages_list.append(page)
+            existing_urls.add(page.get("url"))
+            if not sd.get("best_match"):
+                sd["best_match"] = page
+            added_for_style.append({"query": target.query, "url": product_url, "article": (page.get("bosco") or {}).get("article")})
+
+        # If we matched the exact article for this query, no need to try more.
+        if added_for_style and target.color_code:
+            break
+
+    after_pages = len(pages_list)
+    return {
+        "style": style,
+        "before_pages": before_pages,
+        "after_pages": after_pages,
+        "added_pages": after_pages - before_pages,
+        "added": added_for_style[:50],
+        "queries": tried_queries[:50],
+        "errors": errors[:50],
+    }
+
+
+def write_json(path: Path, data: Any) -> None:
+    # Stream straight to the file: json.dumps would hold a second full copy of the
+    # enriched catalog in memory as one string.
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--cards-json", default="outputs/maxmara/article_cards_full.json")
@@ -281,7 +528,22 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     ap.add_argument("--retries", type=int, default=3)
     ap.add_argument("--delay", type=float, default=0.6)
     ap.add_argument("--max-slugs", type=int, default=12, help="limit product candidates per query")
+    ap.add_argument("--workers", type=int, default=6, help="styles processed concurrently")
+    ap.add_argument("--page-workers", type=int, default=12, help="product pages fetched concurrently")
+    ap.add_argument("--max-connections", type=int, default=16, help="HTTP requests in flight at once")
+    ap.add_argument(
+        "--http-cache-dir",
+        default="",
+        help="If set, cache fetched HTML here (e.g. outputs/maxmara/.bosco_cache) and reuse it on reruns.",
+    )
+    ap.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="parse product pages in this many processes (0 = parse in the fetching thread)",
+    )
     args = ap.parse_args(list(argv) if argv is not None else None)
+    set_max_connections(args.max_connections)
 
     cards_path = Path(args.cards_json)
     out_path = Path(args.out_json)
@@ -304,97 +566,45 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
     matched_styles = 0
     total_pages_added = 0
-    per_style: List[Dict[str, Any]] = []
 
-    for row in rows:
-        style = normalize_space(row.get("style", ""))
-        if only_styles is not None and style not in only_styles:
-            continue
-        sd = ensure_site_data(row)
-        before_pages = len(sd.get("pages") or [])
+    todo = rows
+    if only_styles is not None:
+        todo = [row for row in rows if normalize_space(row.get("style", "")) in only_styles]
 
-        # If already matched somewhere, still try Bosco as an additional source (but don't spam).
-        targets = build_queries_for_row(row)
-
-        added_for_style: List[Dict[str, Any]] = []
-        tried_queries: List[str] = []
-        errors: List[str] = []
-
-        for target in targets:
-            tried_queries.append(target.query)
-            q = quote(target.query, safe="")
-            search_url = f"https://v2.bosco.ru/catalog/?q={q}"
-            try:
-                search_html = curl_get(search_url, timeout_s=args.timeout, retries=args.retries, delay_s=args.delay)
-            except Exception as exc:
-                errors.append(f"search_failed:{target.query}:{exc}")
-                continue
-
-            slugs = parse_slugs_from_catalog_search(search_html)[: max(1, int(args.max_slugs))]
-            if not slugs:
-                continue
-
-            for slug in slugs:
-                product_url = f"https://v2.bosco.ru/product/{slug.strip('/')}/"
-                try:
-                    product_html = curl_get(product_url, timeout_s=args.timeout, retries=args.retries, delay_s=args.delay)
-                    page = parse_bosco_product_page(product_url, product_html)
-                except Exception as exc:
-                    errors.append(f"product_failed:{product_url}:{exc}")
-                    continue
-
-                if not should_accept_for_target(page, target):
-                    continue
-
-                # Avoid duplicates by URL.
-                existing_urls = {p.get("url") for p in (sd.get("pages") or []) if isinstance(p, dict)}
-                if page.get("url") in existing_urls:
-                    continue
-
-                sd["pages"] = list(sd.get("pages") or []) + [page]
-                if not sd.get("best_match"):
-                    sd["best_match"] = page
-                added_for_style.append({"query": target.query, "url": product_url, "article": (page.get("bosco") or {}).get("article")})
-
-            # If we matched the exact article for this query, no need to try more.
-            if added_for_style and target.color_code:
-                break
-
-        after_pages = len(sd.get("pages") or [])
-        added_pages = after_pages - before_pages
-        if added_pages > 0:
+    # Styles are independent: fan them out over one pool (catalog searches), while each style
+    # fans its product pages out over a second, wider pool.
+    global _PARSE_POOL
+    if args.parse_workers > 0:
+        _PARSE_POOL = ProcessPoolExecutor(max_workers=args.parse_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as style_pool, ThreadPoolExecutor(
+            max_workers=max(1, args.page_workers)
+        ) as page_pool:
+            per_style = list(style_pool.map(lambda row: enrich_row(row, args, page_pool), todo))
+    finally:
+        if _PARSE_POOL is not None:
+            _PARSE_POOL.shutdown()
+            _PARSE_POOL = None
+
+    for item in per_style:
+        if item["added_pages"] > 0:
             matched_styles += 1
-            total_pages_added += added_pages
-
-        per_style.append(
-            {
-                "style": style,
-                "before_pages": before_pages,
-                "after_pages": after_pages,
-                "added_pages": added_pages,
-                "added": added_for_style[:50],
-                "queries": tried_queries[:50],
-                "errors": errors[:50],
-            }
-        )
-
-    out_path.write_text(json.dumps(rows, ensure_ascii=False, indent=2) + "\n", "utf-8")
-    summary_path.write_text(
-        json.dumps(
-            {
-                "cards_in": str(cards_path),
-                "cards_out": str(out_path),
-                "styles_total": len(rows),
-                "styles_with_pages_added": matched_styles,
-                "pages_added": total_pages_added,
-                "per_style": per_style,
-            },
-            ensure_ascii=False,
-            indent=2,
-        )
-        + "\n",
-        "utf-8",
-    )
+            total_pages_added += item["added_pages"]
+
+    summary = {
+        "cards_in": str(cards_path),
+        "cards_out": str(out_path),
+        "styles_total": len(rows),
+        "styles_with_pages_added": matched_styles,
+        "pages_added": total_pages_added,
+        "per_style": per_style,
+    }
+    # Both documents are independent; write them side by side so one file's disk flush overlaps
+    # the other's encoding.
+    with ThreadPoolExecutor(max_workers=2) as writer:
+        jobs = [writer.submit(write_json, out_path, rows), writer.submit(write_json, summary_path, summary)]
+    for job in jobs:
+        job.result()
 
     print(
         json.dumps(
@@ -16,6 +16,7 @@ Outputs (default out dir: outputs/maxmara_lsnet):
 - article_cards_unmatched_lsnet.csv
 - run_summary_lsnet.json
 - images/lsnet/<style>/<productId>/...
+- articles_xls.json (only with --only-parse-xls, which stops before any API calls)
 
 Dependencies:
 - stdlib + xlrd==2.0.1 for .xls
@@ -25,16 +26,24 @@ from __future__ import annotations
 
 import argparse
 import csv
+import gzip
+import hashlib
+import heapq
+import http.client
 import json
 import os
 import re
+import shutil
+import sqlite3
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
 from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import Request, build_opener
+from urllib.parse import urlencode, urljoin, urlsplit
 
 try:
     import xlrd  # type: ignore
@@ -49,12 +58,22 @@ UA = (
     "Chrome/131.0.0.0 Safari/537.36"
 )
 
+T = TypeVar("T")
+
 LS_API_BASE = "https://api2.ls.net.ru/apix/v2"
 LS_BRAND_ID_MAXMARA = "473"
 
 
+WS_RE = re.compile(r"\s+")
+
+
 def normalize_space(value: str) -> str:
-    return re.sub(r"\s+", " ", str(value or "")).strip()
+    s = value if isinstance(value, str) else str(value or "")
+    # Fast path: the only whitespace a printable string can hold is " ", so without a double
+    # space there is nothing to collapse.
+    if "  " not in s and s.isprintable():
+        return s.strip()
+    return WS_RE.sub(" ", s).strip()
 
 
 def safe_filename(value: str) -> str:
@@ -74,31 +93,171 @@ def parse_number(value: str) -> Optional[float]:
         return None
 
 
+class UrlCache:
+    """Persistent URL -> response body cache (gzip'ed blobs in SQLite), shared by worker threads."""
+
+    def __init__(self, path: Path, ttl_days: float) -> None:
+        self.ttl_s = max(0.0, ttl_days) * 86400
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (url_hash BLOB PRIMARY KEY, fetched_at INTEGER NOT NULL, body BLOB NOT NULL)"
+        )
+        self.conn.execute("DELETE FROM cache WHERE fetched_at < ?", (self._cutoff(),))
+        self.conn.commit()
+
+    def _cutoff(self) -> int:
+        return int(time.time() - self.ttl_s)
+
+    def get(self, url: str) -> Optional[bytes]:
+        key = hashlib.sha1(url.encode("utf-8")).digest()
+        with self.lock:
+            hit = self.conn.execute(
+                "SELECT body FROM cache WHERE url_hash = ? AND fetched_at >= ?", (key, self._cutoff())
+            ).fetchone()
+        return gzip.decompress(hit[0]) if hit else None
+
+    def put(self, url: str, data: bytes) -> None:
+        key = hashlib.sha1(url.encode("utf-8")).digest()
+        body = gzip.compress(data, 1)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (url_hash, fetched_at, body) VALUES (?, ?, ?)", (key, int(time.time()), body)
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+_MAX_REDIRECTS = 5
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Errors that mean a reused keep-alive socket was closed by the server while idle.
+_STALE_CONN_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
 class HttpClient:
-    def __init__(self, timeout: float, retries: int, delay: float) -> None:
+    def __init__(
+        self,
+        timeout: float,
+        retries: int,
+        delay: float,
+        cache: Optional[UrlCache] = None,
+        cache_images: bool = False,
+    ) -> None:
         self.timeout = timeout
         self.retries = retries
         self.delay = delay
-        self.opener = build_opener()
+        # One keep-alive connection per (thread, scheme, host): the TLS handshake to the API
+        # host is paid once per worker thread instead of once per request.
+        self._local = threading.local()
+        # Parsed responses of idempotent catalog searches, shared by all articles in this run.
+        self._memo: Dict[str, Any] = {}
+        self.cache = cache
+        self.cache_images = cache_images
+
+    def get_bytes(self, url: str, use_cache: bool = True) -> bytes:
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            cached = cache.get(url)
+            if cached is not None:
+                return cached
+        data = self._request(url, lambda resp: resp.read())
+        if cache is not None:
+            cache.put(url, data)
+        return data
+
+    def download_file(self, url: str, dst: Path) -> None:
+        """Stream url into dst via a .part file, so an interrupted download never leaves a
+        non-empty dst behind (which would be skipped as already downloaded)."""
+        tmp = dst.with_name(dst.name + ".part")
+        try:
+            if self.cache is not None and self.cache_images:
+                tmp.write_bytes(self.get_bytes(url))
+            else:
+                self._request(url, lambda resp: _copy_to_file(resp, tmp))
+            os.replace(tmp, dst)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def _connection(self, scheme: str, netloc: str, fresh: bool = False) -> http.client.HTTPConnection:
+        pool: Optional[Dict[Tuple[str, str], http.client.HTTPConnection]] = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = {}
+        conn = pool.get((scheme, netloc))
+        if conn is not None and fresh:
+            conn.close()
+            conn = None
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = pool[(scheme, netloc)] = cls(netloc, timeout=self.timeout)
+        return conn
+
+    def _drop_connection(self, scheme: str, netloc: str) -> None:
+        conn = (getattr(self._local, "pool", None) or {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def _send(self, url: str) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse, str, str]:
+        headers = {
+            "User-Agent": UA,
+            "Accept": "application/json,text/plain,*/*",
+            "Accept-Encoding": "gzip",
+            "X-Platform": "web",
+        }
+        for _ in range(_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn = self._connection(parts.scheme, parts.netloc)
+            reused = conn.sock is not None
+            try:
+                try:
+                    conn.request("GET", path, headers=headers)
+                    resp = conn.getresponse()
+                except _STALE_CONN_ERRORS:
+                    if not reused:
+                        raise
+                    conn = self._connection(parts.scheme, parts.netloc, fresh=True)
+                    conn.request("GET", path, headers=headers)
+                    resp = conn.getresponse()
+            except Exception:
+                self._drop_connection(parts.scheme, parts.netloc)
+                raise
 
-    def get_bytes(self, url: str) -> bytes:
+            if resp.status in _REDIRECT_STATUSES and resp.getheader("Location"):
+                resp.read()
+                url = urljoin(url, resp.getheader("Location") or "")
+                continue
+            if resp.status >= 400:
+                resp.read()
+                raise HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            return conn, resp, parts.scheme, parts.netloc
+        raise URLError("too many redirects")
+
+    def _request(self, url: str, consume: Callable[[BinaryIO], T]) -> T:
         last_exc: Optional[Exception] = None
         for attempt in range(self.retries + 1):
             try:
-                req = Request(
-                    url,
-                    headers={
-                        "User-Agent": UA,
-                        "Accept": "application/json,text/plain,*/*",
-                        "X-Platform": "web",
-                    },
-                )
-                with self.opener.open(req, timeout=self.timeout) as resp:
-                    data = resp.read()
-                    if self.delay > 0:
-                        time.sleep(self.delay)
-                    return data
-            except (HTTPError, URLError, TimeoutError, OSError) as exc:
+                conn, resp, scheme, netloc = self._send(url)
+                try:
+                    if (resp.getheader("Content-Encoding") or "").lower() == "gzip":
+                        data = consume(gzip.GzipFile(fileobj=resp))  # type: ignore[arg-type]
+                        resp.read()
+                    else:
+                        data = consume(resp)  # type: ignore[arg-type]
+                except Exception:
+                    self._drop_connection(scheme, netloc)
+                    raise
+                if resp.will_close:
+                    self._drop_connection(scheme, netloc)
+                if self.delay > 0:
+                    time.sleep(self.delay)
+                return data
+            except (HTTPError, URLError, TimeoutError, OSError, http.client.HTTPException) as exc:
                 last_exc = exc
                 if attempt < self.retries:
                     time.sleep(min(2.5, 0.5 + attempt * 0.4))
@@ -108,9 +267,21 @@ class HttpClient:
             raise last_exc
         raise RuntimeError("unexpected fetch state")
 
-    def get_json(self, url: str) -> Any:
+    def get_json(self, url: str, memoize: bool = False) -> Any:
+        """Fetch and parse JSON. With memoize=True the parsed value is reused for repeat URLs
+        within the run, so callers must treat it as read-only."""
+        if memoize and url in self._memo:
+            return self._memo[url]
         data = self.get_bytes(url)
-        return json.loads(data.decode("utf-8", "ignore"))
+        parsed = json.loads(data.decode("utf-8", "ignore"))
+        if memoize:
+            parsed = self._memo.setdefault(url, parsed)
+        return parsed
+
+
+def _copy_to_file(resp: BinaryIO, path: Path) -> None:
+    with path.open("wb") as fp:
+        shutil.copyfileobj(resp, fp, 1 << 16)
 
 
 @dataclass
@@ -128,7 +299,7 @@ class ArticleSeed:
 def parse_xls_articles(path: Path) -> List[ArticleSeed]:
     wb = xlrd.open_workbook(str(path))
     sh = wb.sheet_by_index(0)
-    headers = [str(sh.cell_value(0, c)).strip() for c in range(sh.ncols)]
+    headers = [str(v).strip() for v in sh.row_values(0)]
     idx = {h: i for i, h in enumerate(headers)}
 
     required = ["Style", "Commercial Style", "Name", "Var Comm", "Var Description OE", "Sizing", "Ean Code", "Qta"]
@@ -138,57 +309,55 @@ def parse_xls_articles(path: Path) -> List[ArticleSeed]:
 
     by_style: Dict[str, Dict[str, Any]] = {}
 
-    def add_set(bucket: Dict[str, set], key: str, value: str) -> None:
+    # Per-style value sets are dicts with None values: cheaper than small sets to build, and
+    # sorted() reads the keys directly.
+    def add_key(bucket: Dict[str, Dict[str, None]], key: str, value: str) -> None:
         val = normalize_space(value)
         if not val:
             return
-        bucket.setdefault(key, set()).add(val)
+        bucket.setdefault(key, {})[val] = None
 
-    for r in range(1, sh.nrows):
-        style = normalize_space(sh.cell_value(r, idx["Style"]))
+    # Pull each needed column once (one xlrd call per column instead of one per cell) and walk
+    # the rows as tuples.
+    columns = [sh.col_values(idx[col], start_rowx=1) for col in required]
+    for raw_style, raw_cs, raw_name, var_comm, var_desc, sizing, ean, qta in zip(*columns):
+        style = normalize_space(raw_style)
         if not style:
             continue
 
-        bucket = by_style.setdefault(
-            style,
-            {
+        bucket = by_style.get(style)
+        if bucket is None:
+            bucket = by_style[style] = {
                 "style": style,
-                "commercial_style": normalize_space(sh.cell_value(r, idx["Commercial Style"])),
-                "name": normalize_space(sh.cell_value(r, idx["Name"])),
+                "commercial_style": normalize_space(raw_cs),
+                "name": normalize_space(raw_name),
                 "sets": {},
                 "qty": 0,
-            },
-        )
+            }
 
-        sets: Dict[str, set] = bucket["sets"]
-        add_set(sets, "var_comm_codes", str(sh.cell_value(r, idx["Var Comm"])))
-        add_set(sets, "var_descriptions", str(sh.cell_value(r, idx["Var Description OE"])))
-        add_set(sets, "sizes", str(sh.cell_value(r, idx["Sizing"])))
-        add_set(sets, "eans", str(sh.cell_value(r, idx["Ean Code"])))
+        sets: Dict[str, Dict[str, None]] = bucket["sets"]
+        add_key(sets, "var_comm_codes", str(var_comm))
+        add_key(sets, "var_descriptions", str(var_desc))
+        add_key(sets, "sizes", str(sizing))
+        add_key(sets, "eans", str(ean))
 
-        q = parse_number(str(sh.cell_value(r, idx["Qta"]))) or 0.0
+        q = parse_number(str(qta)) or 0.0
         bucket["qty"] += int(round(q))
 
-    out: List[ArticleSeed] = []
-    for _, item in sorted(by_style.items()):
-        sets = item["sets"]
-        out.append(
-            ArticleSeed(
-                style=item["style"],
-                commercial_style=item["commercial_style"],
-                name=item["name"],
-                var_comm_codes=sorted(sets.get("var_comm_codes", set())),
-                var_descriptions=sorted(sets.get("var_descriptions", set())),
-                sizes=sorted(sets.get("sizes", set())),
-                eans=sorted(sets.get("eans", set())),
-                total_qty=item["qty"],
-            )
+    # Style keys are unique, so sorting the keys alone orders the same way as sorting items.
+    return [
+        ArticleSeed(
+            style=item["style"],
+            commercial_style=item["commercial_style"],
+            name=item["name"],
+            var_comm_codes=sorted(item["sets"].get("var_comm_codes") or ()),
+            var_descriptions=sorted(item["sets"].get("var_descriptions") or ()),
+            sizes=sorted(item["sets"].get("sizes") or ()),
+            eans=sorted(item["sets"].get("eans") or ()),
+            total_qty=item["qty"],
         )
-
-    return out
-
-
-SKU_SPLIT_RE = re.compile(r"\s+")
+        for item in map(by_style.__getitem__, sorted(by_style))
+    ]
 
 
 def sku_tokens(sku: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
@@ -196,7 +365,8 @@ def sku_tokens(sku: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     sku = normalize_space(sku)
     if not sku:
         return None, None, None
-    parts = SKU_SPLIT_RE.split(sku)
+    # normalize_space leaves single " " separators, so a plain split is enough.
+    parts = sku.split(" ", 3)
     if len(parts) >= 3:
         model = parts[0]
         code = parts[1]
@@ -205,8 +375,16 @@ def sku_tokens(sku: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     return parts[0], None, None
 
 
+NON_DIGIT_RE = re.compile(r"\D+")
+
+
+def digits_only(value: str) -> str:
+    # isdecimal() is exactly "every char matches \d", so already-clean codes skip the regex.
+    return value if value.isdecimal() else NON_DIGIT_RE.sub("", value)
+
+
 def style_base_and_suffix(style: str) -> Tuple[Optional[str], Optional[str]]:
-    s = re.sub(r"\D+", "", style or "")
+    s = digits_only(style or "")
     if len(s) >= 13:
         return s[:10], s[-3:]
     if len(s) >= 10:
@@ -222,7 +400,7 @@ def build_search_terms(article: ArticleSeed) -> List[str]:
         terms.append(name)
 
     # Search by commercial style + color code is often too broad, but helps if name search fails.
-    cs = re.sub(r"\D+", "", article.commercial_style or "")
+    cs = digits_only(article.commercial_style or "")
     var = next((v for v in article.var_comm_codes if v.isdigit()), None)
     if cs and var:
         terms.append(f"{cs} {var}")
@@ -258,36 +436,59 @@ def ls_product_url(product_id: str) -> str:
     return f"{LS_API_BASE}/product/{product_id}"
 
 
-def score_candidate(article: ArticleSeed, cand: Dict[str, Any]) -> int:
+@dataclass(frozen=True)
+class ScoreCtx:
+    """Article-side inputs of score_candidate, computed once per article instead of per candidate."""
+
+    name_upper: str
+    st_base: Optional[str]
+    st_suf: Optional[str]
+    cs_base: Optional[str]
+    cs_suf: Optional[str]
+    vars3: frozenset
+
+    @classmethod
+    def for_article(cls, article: ArticleSeed) -> ScoreCtx:
+        st_base, st_suf = style_base_and_suffix(article.style)
+        cs_base, cs_suf = style_base_and_suffix(article.commercial_style)
+        return cls(
+            name_upper=normalize_space(article.name).upper(),
+            st_base=st_base,
+            st_suf=st_suf,
+            cs_base=cs_base,
+            cs_suf=cs_suf,
+            vars3=frozenset(v.zfill(3) for v in article.var_comm_codes if v.isdigit()),
+        )
+
+
+def score_candidate(ctx: ScoreCtx, cand: Dict[str, Any]) -> int:
     score = 0
 
-    sku = normalize_space(str(cand.get("sku") or ""))
-    model, code, color = sku_tokens(sku)
+    # sku_tokens normalizes the raw value itself; no separate normalize_space pass needed.
+    model, code, color = sku_tokens(str(cand.get("sku") or ""))
 
-    name = normalize_space(article.name).upper()
-    if model and model.upper() == name:
-        score += 10
-    elif model and name and name in model.upper():
-        score += 6
+    if model:
+        name = ctx.name_upper
+        model_upper = model.upper()
+        if model_upper == name:
+            score += 10
+        elif name and name in model_upper:
+            score += 6
 
     # Style/commercial base code match
-    st_base, st_suf = style_base_and_suffix(article.style)
-    cs_base, cs_suf = style_base_and_suffix(article.commercial_style)
-
     if code:
-        if st_base and code.startswith(st_base):
+        if ctx.st_base and code.startswith(ctx.st_base):
             score += 5
-        if cs_base and code.startswith(cs_base):
+        if ctx.cs_base and code.startswith(ctx.cs_base):
             score += 4
 
     # Color code match (LS uses 3-digit color in SKU)
-    vars3 = {v.zfill(3) for v in article.var_comm_codes if v.isdigit()}
     if color:
-        if color in vars3:
+        if color in ctx.vars3:
             score += 3
-        if st_suf and color == st_suf:
+        if ctx.st_suf and color == ctx.st_suf:
             score += 2
-        if cs_suf and color == cs_suf:
+        if ctx.cs_suf and color == ctx.cs_suf:
             score += 2
 
     # Minor boosts
@@ -298,20 +499,27 @@ def score_candidate(article: ArticleSeed, cand: Dict[str, Any]) -> int:
 
 
 def pick_top_candidates(article: ArticleSeed, catalog_items: List[Dict[str, Any]], top_n: int) -> List[Dict[str, Any]]:
-    scored = []
-    for it in catalog_items:
-        scored.append((score_candidate(article, it), it))
-    scored.sort(key=lambda x: x[0], reverse=True)
+    ctx = ScoreCtx.for_article(article)
+    scored = [(score_candidate(ctx, it), it) for it in catalog_items]
 
+    # nlargest is equivalent to a stable descending sort truncated to top_n (ties keep input
+    # order), without sorting the whole candidate list.
     out: List[Dict[str, Any]] = []
-    for s, it in scored[:top_n]:
+    for s, it in heapq.nlargest(top_n, scored, key=itemgetter(0)):
         it2 = dict(it)
         it2["_score"] = s
         out.append(it2)
     return out
 
 
-def download_ls_images(client: HttpClient, style: str, product: Dict[str, Any], out_dir: Path, overwrite: bool) -> Dict[str, Any]:
+def download_ls_images(
+    client: HttpClient,
+    style: str,
+    product: Dict[str, Any],
+    out_dir: Path,
+    overwrite: bool,
+    pool: Optional[ThreadPoolExecutor] = None,
+) -> Dict[str, Any]:
     product_id = str(product.get("id") or "")
     if not product_id:
         return {"downloaded": 0, "skipped": 0, "failed": 0, "dir": ""}
@@ -339,6 +547,7 @@ def download_ls_images(client: HttpClient, style: str, product: Dict[str, Any],
             if isinstance(u, str) and u.startswith("http"):
                 yield key, u
 
+    tasks: List[Tuple[str, Path]] = []
     for idx, ph in enumerate(photos):
         if not isinstance(ph, dict):
             continue
@@ -349,44 +558,180 @@ def download_ls_images(client: HttpClient, style: str, product: Dict[str, Any],
             if dst.exists() and dst.stat().st_size > 0 and not overwrite:
                 skipped += 1
                 continue
-            try:
-                data = client.get_bytes(url)
-                dst.write_bytes(data)
-                downloaded += 1
-            except Exception:
-                failed += 1
+            tasks.append((url, dst))
+
+    def fetch_one(task: Tuple[str, Path]) -> bool:
+        try:
+            client.download_file(*task)
+            return True
+        except Exception:
+            return False
+
+    results = pool.map(fetch_one, tasks) if pool is not None else map(fetch_one, tasks)
+    for ok in results:
+        if ok:
+            downloaded += 1
+        else:
+            failed += 1
 
     return {"downloaded": downloaded, "skipped": skipped, "failed": failed, "dir": str(root)}
 
 
-def flatten_for_csv(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
+CSV_FIELDS = (
+    "style",
+    "commercial_style",
+    "name",
+    "var_comm_codes",
+    "var_descriptions",
+    "xls_sizes",
+    "total_qty",
+    "matched",
+    "best_product_id",
+    "best_product_url",
+    "best_sku",
+    "best_model",
+    "best_price",
+    "best_brand",
+    "best_season",
+    "best_description",
+    "best_photos",
+    "candidate_count",
+    "image_dir",
+)
+
+
+def iter_csv_rows(rows: List[Dict[str, Any]]) -> Iterable[Tuple[Any, ...]]:
+    """Yield one tuple per row in CSV_FIELDS order."""
     for row in rows:
-        best = (row.get("lsnet") or {}).get("best") or {}
-        out.append(
-            {
-                "style": row.get("style", ""),
-                "commercial_style": row.get("commercial_style", ""),
-                "name": row.get("name", ""),
-                "var_comm_codes": "; ".join(row.get("var_comm_codes", [])),
-                "var_descriptions": "; ".join(row.get("var_descriptions", [])),
-                "xls_sizes": "; ".join(row.get("sizes", [])),
-                "total_qty": row.get("total_qty", 0),
-                "matched": bool(best),
-                "best_product_id": best.get("id", ""),
-                "best_product_url": best.get("product_url", ""),
-                "best_sku": best.get("sku", ""),
-                "best_model": best.get("model", ""),
-                "best_price": best.get("price", ""),
-                "best_brand": (best.get("brand") or {}).get("name", ""),
-                "best_season": best.get("season", ""),
-                "best_description": best.get("description", ""),
-                "best_photos": len(best.get("photos") or []) if isinstance(best.get("photos"), list) else 0,
-                "candidate_count": len((row.get("lsnet") or {}).get("candidates") or []),
-                "image_dir": (row.get("download") or {}).get("dir", ""),
-            }
+        lsnet = row.get("lsnet")
+        if not isinstance(lsnet, dict):
+            lsnet = {}
+        best = lsnet.get("best")
+        if not isinstance(best, dict):
+            best = {}
+        photos = best.get("photos")
+        candidates = lsnet.get("candidates")
+        brand = best.get("brand")
+        yield (
+            row.get("style", ""),
+            row.get("commercial_style", ""),
+            row.get("name", ""),
+            "; ".join(row.get("var_comm_codes", [])),
+            "; ".join(row.get("var_descriptions", [])),
+            "; ".join(row.get("sizes", [])),
+            row.get("total_qty", 0),
+            bool(best),
+            best.get("id", ""),
+            best.get("product_url", ""),
+            best.get("sku", ""),
+            best.get("model", ""),
+            best.get("price", ""),
+            brand.get("name", "") if isinstance(brand, dict) else "",
+            best.get("season", ""),
+            best.get("description", ""),
+            len(photos) if isinstance(photos, list) else 0,
+            len(candidates) if isinstance(candidates, list) else 0,
+            (row.get("download") or {}).get("dir", ""),
         )
-    return out
+
+
+def process_article(
+    client: HttpClient,
+    a: ArticleSeed,
+    args: argparse.Namespace,
+    out_dir: Path,
+    image_variants: List[str],
+    image_pool: Optional[ThreadPoolExecutor] = None,
+    score_pool: Optional[Executor] = None,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Search, score and fetch one article; returns (row, unmatched entry or None)."""
+    terms = build_search_terms(a)
+    # Candidates de-duplicated by id as they arrive; first occurrence wins.
+    items_by_id: Dict[str, Dict[str, Any]] = {}
+    term_debug: List[Dict[str, Any]] = []
+
+    for term in terms[:3]:
+        items_for_term = 0
+        for page in range(1, max(1, args.search_pages) + 1):
+            url = ls_catalog_search_url(term=term, limit=args.search_limit, page=page, brand_id=LS_BRAND_ID_MAXMARA)
+            try:
+                data = client.get_json(url, memoize=True)
+            except Exception as exc:
+                term_debug.append({"term": term, "page": page, "error": normalize_space(str(exc))})
+                continue
+            items = data.get("productsData") if isinstance(data, dict) else None
+            if isinstance(items, list):
+                for it in items:
+                    if isinstance(it, dict) and it.get("id"):
+                        items_for_term += 1
+                        items_by_id.setdefault(str(it["id"]), it)
+            # if nothing else, don't paginate
+            if isinstance(data, dict) and data.get("is_there_more") is False:
+                break
+        term_debug.append({"term": term, "items": items_for_term})
+
+    dedup_items = list(items_by_id.values())
+
+    top_n = max(1, args.top_n)
+    if score_pool is not None:
+        top = score_pool.submit(pick_top_candidates, a, dedup_items, top_n).result()
+    else:
+        top = pick_top_candidates(a, dedup_items, top_n=top_n)
+
+    row: Dict[str, Any] = {
+        "style": a.style,
+        "commercial_style": a.commercial_style,
+        "name": a.name,
+        "var_comm_codes": a.var_comm_codes,
+        "var_descriptions": a.var_descriptions,
+        "sizes": a.sizes,
+        "eans": a.eans,
+        "total_qty": a.total_qty,
+        "lsnet": {
+            "search_terms": terms,
+            "search_debug": term_debug,
+            "candidate_total": len(dedup_items),
+            "candidates": top,
+            "best": None,
+        },
+        "download": {"downloaded": 0, "skipped": 0, "failed": 0, "dir": ""},
+    }
+
+    if top:
+        best_id = str(top[0].get("id"))
+        try:
+            best = client.get_json(ls_product_url(best_id))
+            if isinstance(best, dict):
+                best["product_url"] = f"https://ls.net.ru/products/{best_id}-{best.get('url') or ''}".rstrip("-")
+                best["_download_variants"] = image_variants
+            row["lsnet"]["best"] = best
+            if args.download_images and isinstance(best, dict):
+                row["download"] = download_ls_images(
+                    client=client,
+                    style=a.style,
+                    product=best,
+                    out_dir=out_dir,
+                    overwrite=args.overwrite_images,
+                    pool=image_pool,
+                )
+        except Exception as exc:
+            row["lsnet"]["best_error"] = normalize_space(str(exc))
+
+    if row["lsnet"].get("best"):
+        return row, None
+    return row, {
+        "style": a.style,
+        "commercial_style": a.commercial_style,
+        "name": a.name,
+        "var_comm_codes": "; ".join(a.var_comm_codes),
+        "var_descriptions": "; ".join(a.var_descriptions),
+    }
+
+
+def write_json(path: Path, data: Any) -> None:
+    # json.dump encodes straight into the file instead of building the whole document as one str.
+    with path.open("w", encoding="utf-8") as fp:
+        json.dump(data, fp, ensure_ascii=False, indent=2)
 
 
 def main() -> None:
@@ -409,152 +754,122 @@ def main() -> None:
         default="large",
         help="Comma-separated photo variants to download per image: initial,normal,large. Default: large",
     )
+    ap.add_argument("--workers", type=int, default=8, help="Articles processed concurrently (HTTP-bound).")
+    ap.add_argument("--image-workers", type=int, default=8, help="Image files downloaded concurrently.")
+    ap.add_argument(
+        "--score-workers",
+        type=int,
+        default=0,
+        help="Score candidates in this many processes (0 = in the article worker thread).",
+    )
+    ap.add_argument(
+        "--cache-ttl-days",
+        type=float,
+        default=7.0,
+        help="Reuse LS API responses cached in <out-dir>/.http_cache.sqlite for this long. 0 disables the cache.",
+    )
+    ap.add_argument("--cache-images", action="store_true", help="Also cache downloaded image bytes (large).")
+    ap.add_argument(
+        "--only-parse-xls",
+        action="store_true",
+        help="Parse the XLS, write <out-dir>/articles_xls.json and exit without any LS API calls.",
+    )
     args = ap.parse_args()
 
     xls_path = Path(args.xls)
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    client = HttpClient(timeout=args.timeout, retries=args.retries, delay=args.delay)
-    image_variants = [v.strip() for v in str(args.image_variants).split(",") if v.strip()]
-    image_variants = [v for v in image_variants if v in {"initial", "normal", "large"}] or ["large"]
-
     print("[1/5] Parse XLS...")
     articles = parse_xls_articles(xls_path)
     print(f"  unique articles: {len(articles)}")
 
-    print("[2/5] Search catalog for candidates...")
-    rows: List[Dict[str, Any]] = []
-    unmatched: List[Dict[str, Any]] = []
-
-    for idx, a in enumerate(articles, 1):
-        terms = build_search_terms(a)
-        all_items: List[Dict[str, Any]] = []
-        term_debug: List[Dict[str, Any]] = []
+    if args.only_parse_xls:
+        # Cheap inspection path for XLS/schema debugging; leaves previous LS outputs untouched.
+        xls_json_path = out_dir / "articles_xls.json"
+        write_json(xls_json_path, [asdict(a) for a in articles])
+        print(json.dumps({"article_total": len(articles), "json": str(xls_json_path)}, ensure_ascii=False))
+        return
 
-        for term in terms[:3]:
-            items_for_term: List[Dict[str, Any]] = []
-            for page in range(1, max(1, args.search_pages) + 1):
-                url = ls_catalog_search_url(term=term, limit=args.search_limit, page=page, brand_id=LS_BRAND_ID_MAXMARA)
-                try:
-                    data = client.get_json(url)
-                except Exception as exc:
-                    term_debug.append({"term": term, "page": page, "error": normalize_space(str(exc))})
-                    continue
-                items = data.get("productsData") if isinstance(data, dict) else None
-                if isinstance(items, list):
-                    for it in items:
-                        if isinstance(it, dict) and it.get("id"):
-                            items_for_term.append(it)
-                # if nothing else, don't paginate
-                if isinstance(data, dict) and data.get("is_there_more") is False:
-                    break
-            term_debug.append({"term": term, "items": len(items_for_term)})
-            all_items.extend(items_for_term)
-
-        # de-dup by id
-        seen_ids = set()
-        dedup_items: List[Dict[str, Any]] = []
-        for it in all_items:
-            pid = str(it.get("id"))
-            if not pid or pid in seen_ids:
-                continue
-            seen_ids.add(pid)
-            dedup_items.append(it)
-
-        top = pick_top_candidates(a, dedup_items, top_n=max(1, args.top_n))
-
-        row: Dict[str, Any] = {
-            "style": a.style,
-            "commercial_style": a.commercial_style,
-            "name": a.name,
-            "var_comm_codes": a.var_comm_codes,
-            "var_descriptions": a.var_descriptions,
-            "sizes": a.sizes,
-            "eans": a.eans,
-            "total_qty": a.total_qty,
-            "lsnet": {
-                "search_terms": terms,
-                "search_debug": term_debug,
-                "candidate_total": len(dedup_items),
-                "candidates": top,
-                "best": None,
+    cache = UrlCache(out_dir / ".http_cache.sqlite", args.cache_ttl_days) if args.cache_ttl_days > 0 else None
+    try:
+        client = HttpClient(
+            timeout=args.timeout,
+            retries=args.retries,
+            delay=args.delay,
+            cache=cache,
+            cache_images=args.cache_images,
+        )
+        image_variants = [v.strip() for v in str(args.image_variants).split(",") if v.strip()]
+        image_variants = [v for v in image_variants if v in {"initial", "normal", "large"}] or ["large"]
+
+        print("[2/5] Search catalog for candidates...")
+        rows: List[Dict[str, Any]] = []
+        unmatched: List[Dict[str, Any]] = []
+
+        # Articles are independent and the phase is dominated by API round-trips, so overlap them
+        # on a thread pool; map() keeps results (and the progress log) in input order.
+        # Image files go through one shared pool, so concurrent articles do not multiply the number
+        # of parallel downloads.
+        # --score-workers moves candidate scoring (pure CPU) off the GIL when search limits are
+        # large enough for it to compete with the fetch threads.
+        score_pool = ProcessPoolExecutor(max_workers=args.score_workers) if args.score_workers > 0 else None
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool, ThreadPoolExecutor(
+                max_workers=max(1, args.image_workers)
+            ) as image_pool:
+                results = pool.map(
+                    lambda a: process_article(client, a, args, out_dir, image_variants, image_pool, score_pool),
+                    articles,
+                )
+                for idx, (row, unmatched_entry) in enumerate(results, 1):
+                    if unmatched_entry is not None:
+                        unmatched.append(unmatched_entry)
+                    rows.append(row)
+                    if idx % 5 == 0:
+                        print(f"  processed {idx}/{len(articles)}")
+        finally:
+            if score_pool is not None:
+                score_pool.shutdown()
+
+        print("[3/5] Write outputs...")
+        json_path = out_dir / "article_cards_full_lsnet.json"
+        write_json(json_path, rows)
+
+        csv_path = out_dir / "article_cards_full_lsnet.csv"
+        if rows:
+            with csv_path.open("w", encoding="utf-8", newline="") as fp:
+                w = csv.writer(fp)
+                w.writerow(CSV_FIELDS)
+                w.writerows(iter_csv_rows(rows))
+
+        unmatched_path = out_dir / "article_cards_unmatched_lsnet.csv"
+        with unmatched_path.open("w", encoding="utf-8", newline="") as fp:
+            fields = ["style", "commercial_style", "name", "var_comm_codes", "var_descriptions"]
+            w = csv.DictWriter(fp, fieldnames=fields)
+            w.writeheader()
+            w.writerows(unmatched)
+
+        matched = sum(1 for r in rows if (r.get("lsnet") or {}).get("best"))
+        summary = {
+            "article_total": len(rows),
+            "article_matched": matched,
+            "article_unmatched": len(rows) - matched,
+            "outputs": {
+                "json": str(json_path),
+                "csv": str(csv_path),
+                "unmatched_csv": str(unmatched_path),
+                "images_root": str(out_dir / "images" / "lsnet"),
             },
-            "download": {"downloaded": 0, "skipped": 0, "failed": 0, "dir": ""},
         }
 
-        if top:
-            best_id = str(top[0].get("id"))
-            try:
-                best = client.get_json(ls_product_url(best_id))
-                if isinstance(best, dict):
-                    best["product_url"] = f"https://ls.net.ru/products/{best_id}-{best.get('url') or ''}".rstrip("-")
-                    best["_download_variants"] = image_variants
-                row["lsnet"]["best"] = best
-                if args.download_images and isinstance(best, dict):
-                    row["download"] = download_ls_images(
-                        client=client,
-                        style=a.style,
-                        product=best,
-                        out_dir=out_dir,
-                        overwrite=args.overwrite_images,
-                    )
-            except Exception as exc:
-                row["lsnet"]["best_error"] = normalize_space(str(exc))
-
-        if not row["lsnet"].get("best"):
-            unmatched.append(
-                {
-                    "style": a.style,
-                    "commercial_style": a.commercial_style,
-                    "name": a.name,
-                    "var_comm_codes": "; ".join(a.var_comm_codes),
-                    "var_descriptions": "; ".join(a.var_descriptions),
-                }
-            )
-
-        rows.append(row)
-        if idx % 5 == 0:
-            print(f"  processed {idx}/{len(articles)}")
-
-    print("[3/5] Write outputs...")
-    json_path = out_dir / "article_cards_full_lsnet.json"
-    json_path.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    csv_rows = flatten_for_csv(rows)
-    csv_path = out_dir / "article_cards_full_lsnet.csv"
-    if csv_rows:
-        with csv_path.open("w", encoding="utf-8", newline="") as fp:
-            w = csv.DictWriter(fp, fieldnames=list(csv_rows[0].keys()))
-            w.writeheader()
-            w.writerows(csv_rows)
-
-    unmatched_path = out_dir / "article_cards_unmatched_lsnet.csv"
-    with unmatched_path.open("w", encoding="utf-8", newline="") as fp:
-        fields = ["style", "commercial_style", "name", "var_comm_codes", "var_descriptions"]
-        w = csv.DictWriter(fp, fieldnames=fields)
-        w.writeheader()
-        w.writerows(unmatched)
-
-    matched = sum(1 for r in rows if (r.get("lsnet") or {}).get("best"))
-    summary = {
-        "article_total": len(rows),
-        "article_matched": matched,
-        "article_unmatched": len(rows) - matched,
-        "outputs": {
-            "json": str(json_path),
-            "csv": str(csv_path),
-            "unmatched_csv": str(unmatched_path),
-            "images_root": str(out_dir / "images" / "lsnet"),
-        },
-    }
-
-    (out_dir / "run_summary_lsnet.json").write_text(
-        json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+        write_json(out_dir / "run_summary_lsnet.json", summary)
 
-    print("[4/5] Summary")
-    print(json.dumps(summary, ensure_ascii=False, indent=2))
+        print("[4/5] Summary")
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    finally:
+        if cache is not None:
+            cache.close()
 
 
 if __name__ == "__main__":
@@ -16,13 +16,22 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+
+WS_RE = re.compile(r"\s+")
 
 
 def normalize_space(v: Any) -> str:
-    return re.sub(r"\s+", " ", str(v or "")).strip()
+    s = v if isinstance(v, str) else str(v or "")
+    # Fast path: the only whitespace a printable string can hold is " ", so without a double
+    # space there is nothing to collapse.
+    if "  " not in s and s.isprintable():
+        return s.strip()
+    return WS_RE.sub(" ", s).strip()
 
 
 def ensure_site_data(row: Dict[str, Any]) -> Dict[str, Any]:
@@ -50,21 +59,18 @@ def pick_ls_images(best: Dict[str, Any]) -> List[Dict[str, str]]:
     photos = best.get("photos")
     if not isinstance(photos, list):
         return []
+    # Prefer large -> normal -> initial; dict.fromkeys de-dups while keeping photo order.
+    urls = dict.fromkeys(
+        url
+        for ph in photos
+        if isinstance(ph, dict)
+        for url in (ph.get("large") or ph.get("normal") or ph.get("initial"),)
+        if isinstance(url, str) and url.startswith("http")
+    )
     out: List[Dict[str, str]] = []
-    seen = set()
-    for idx, ph in enumerate(photos):
-        if not isinstance(ph, dict):
-            continue
-        # Prefer large -> normal -> initial
-        url = ph.get("large") or ph.get("normal") or ph.get("initial")
-        if not isinstance(url, str) or not url.startswith("http"):
-            continue
-        if url in seen:
-            continue
-        seen.add(url)
-        fn = url.split("?", 1)[0].rsplit("/", 1)[-1]
-        out.append({"url": url, "url_no_query": url.split("?", 1)[0], "kind": "detail", "filename": fn})
-    # Stable sort: keep original order, but ensure at least 1.
+    for url in urls:
+        no_query = url.split("?", 1)[0]
+        out.append({"url": url, "url_no_query": no_query, "kind": "detail", "filename": no_query.rsplit("/", 1)[-1]})
     return out
 
 
@@ -72,20 +78,14 @@ def pick_ls_sizes(best: Dict[str, Any]) -> List[str]:
     sizes = best.get("sizes")
     if not isinstance(sizes, list):
         return []
-    out: List[str] = []
-    seen = set()
+    # Case-insensitive de-dup; the first spelling seen wins.
+    by_key: Dict[str, str] = {}
     for s in sizes:
-        if not isinstance(s, dict):
-            continue
-        label = normalize_space(s.get("size") or s.get("normal_size") or "")
-        if not label:
-            continue
-        key = label.upper()
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(label)
-    return out
+        if isinstance(s, dict):
+            label = normalize_space(s.get("size") or s.get("normal_size") or "")
+            if label:
+                by_key.setdefault(label.upper(), label)
+    return list(by_key.values())
 
 
 def pick_ls_color(best: Dict[str, Any]) -> str:
@@ -150,6 +150,81 @@ def build_ls_page(best: Dict[str, Any]) -> Dict[str, Any]:
     return page
 
 
+_JSON_WS = " \t\n\r"
+
+
+def iter_json_array(path: Path, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time, reading the file in chunks.
+
+    Peak memory is one chunk plus one element instead of the whole text plus the whole list.
+    """
+    decoder = json.JSONDecoder()
+    with path.open("r", encoding="utf-8") as fp:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def more() -> None:
+            nonlocal buf, pos, eof
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def next_char() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _JSON_WS:
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if eof:
+                    raise ValueError(f"unexpected end of JSON array in {path}")
+                more()
+
+        if next_char() != "[":
+            raise ValueError(f"expected a JSON array in {path}")
+        pos += 1
+        if next_char() == "]":
+            return
+        while True:
+            next_char()
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more()
+                continue
+            # The value must be followed by "," or "]"; otherwise it may be a number cut at the
+            # chunk boundary ("1." or "12" of "12.5"), so re-read it with more text.
+            nxt = end
+            while nxt < len(buf) and buf[nxt] in _JSON_WS:
+                nxt += 1
+            if (nxt == len(buf) or buf[nxt] not in ",]") and not eof:
+                more()
+                continue
+            pos = end
+            yield item
+            sep = next_char()
+            pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"malformed JSON array in {path} near offset {pos}")
+
+
+def write_json_array(fp: TextIO, items: Iterator[Any]) -> None:
+    """Write items as a JSON array byte-identical to json.dump(list(items), fp, indent=2)."""
+    first = True
+    for item in items:
+        fp.write("[\n  " if first else ",\n  ")
+        # JSON strings never hold raw newlines, so re-indenting one level is a plain replace.
+        fp.write(json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+        first = False
+    fp.write("[]" if first else "\n]")
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--base", default="outputs/maxmara/article_cards_full.json")
@@ -162,34 +237,46 @@ def main() -> int:
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    base_rows: List[Dict[str, Any]] = json.loads(base_path.read_text("utf-8"))
-    lsnet_rows: List[Dict[str, Any]] = json.loads(lsnet_path.read_text("utf-8"))
-
+    # Both inputs are streamed: only the LS.NET "best" objects are kept in memory, and base rows
+    # are enriched and written one at a time.
     by_style: Dict[str, Dict[str, Any]] = {}
-    for r in lsnet_rows:
-        style = normalize_space(r.get("style") or "")
-        best = ((r.get("lsnet") or {}) if isinstance(r.get("lsnet"), dict) else {}).get("best")
-        if not style or not isinstance(best, dict):
+    for r in iter_json_array(lsnet_path):
+        ls = r.get("lsnet")
+        best = ls.get("best") if isinstance(ls, dict) else None
+        if not isinstance(best, dict):
             continue
-        by_style[style] = best
+        # Unmatched rows (no best) are the common case; only normalize styles that will be kept.
+        style = normalize_space(r.get("style") or "")
+        if style:
+            by_style[style] = best
 
+    styles = 0
     added = 0
-    for row in base_rows:
-        style = normalize_space(row.get("style") or "")
-        sd = ensure_site_data(row)
-        pages = sd.get("pages") or []
-        if isinstance(pages, list) and pages:
-            continue
-        best = by_style.get(style)
-        if not best:
-            continue
-        page = build_ls_page(best)
-        sd["pages"] = [page]
-        sd["best_match"] = page
-        added += 1
 
-    out_path.write_text(json.dumps(base_rows, ensure_ascii=False, indent=2) + "\n", "utf-8")
-    print(json.dumps({"styles": len(base_rows), "added_lsnet_pages": added, "out": str(out_path)}, ensure_ascii=False))
+    def merged_rows() -> Iterator[Dict[str, Any]]:
+        nonlocal styles, added
+        for row in iter_json_array(base_path):
+            styles += 1
+            style = normalize_space(row.get("style") or "")
+            sd = ensure_site_data(row)
+            pages = sd.get("pages") or []
+            if not (isinstance(pages, list) and pages):
+                best = by_style.get(style)
+                if best:
+                    page = build_ls_page(best)
+                    sd["pages"] = [page]
+                    sd["best_match"] = page
+                    added += 1
+            yield row
+
+    # Rows are written while the base file is still being read, so go through a temp file; this
+    # also keeps --out == --base safe.
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as fp:
+        write_json_array(fp, merged_rows())
+        fp.write("\n")
+    os.replace(tmp_path, out_path)
+    print(json.dumps({"styles": styles, "added_lsnet_pages": added, "out": str(out_path)}, ensure_ascii=False))
     return 0
 
 
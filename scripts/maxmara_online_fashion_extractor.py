@@ -8,6 +8,7 @@ Outputs:
 - outputs/maxmara/article_cards_full.csv
 - outputs/maxmara/article_cards_unmatched.csv
 - outputs/maxmara/online_fashion_url_index.json
+- outputs/maxmara/parsed_pages_cache.json
 - outputs/maxmara/run_summary.json
 - outputs/maxmara/images/... (optional downloads)
 
@@ -17,21 +18,29 @@ No non-stdlib deps besides xlrd for .xls parsing.
 from __future__ import annotations
 
 import argparse
+import copy
 import csv
+import gzip
 import html
+import http.client
+import io
 import json
 import os
+import random
 import re
+import shutil
 import subprocess
+import threading
 import time
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
 from urllib.error import HTTPError, URLError
-from urllib.parse import urljoin, urlparse
-from urllib.request import Request, build_opener
+from urllib.parse import urljoin, urlparse, urlsplit
 
 
 try:
@@ -42,6 +51,8 @@ except Exception as exc:  # pragma: no cover
     ) from exc
 
 
+T = TypeVar("T")
+
 UA = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -72,21 +83,109 @@ BRAND_SEGMENTS = {
 
 IMAGE_EXT_RE = re.compile(r"\.(?:jpg|jpeg|png|webp)(?:\?|$)", re.IGNORECASE)
 
+WS_RE = re.compile(r"\s+")
+SCRIPT_OPEN_RE = re.compile(r"<script", re.IGNORECASE)
+SCRIPT_CLOSE_RE = re.compile(r"</script>", re.IGNORECASE)
+STYLE_OPEN_RE = re.compile(r"<style", re.IGNORECASE)
+STYLE_CLOSE_RE = re.compile(r"</style>", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^>]+>")
+UNSAFE_FILENAME_RE = re.compile(r"[^a-zA-Z0-9._-]+")
+DASH_RUN_RE = re.compile(r"-+")
+
+SITEMAP_PART_RE = re.compile(
+    r"<loc>(https://www\.online-fashion\.ru/sitemap/online-fashion\.ru/product\.part\d+\.xml)</loc>"
+)
+# Only Max Mara product URLs ("s-max-mara" and "max-mara-weekend" both contain "max-mara"),
+# so other brands are never materialized.
+SITEMAP_MM_PRODUCT_RE = re.compile(
+    r"<loc>(https://www\.online-fashion\.ru/product/[^<]*?(?i:max-mara)[^<]*)</loc>"
+)
+
+TITLE_RE = re.compile(r"<title[^>]*>([\s\S]*?)</title>", re.IGNORECASE)
+CANONICAL_RE = re.compile(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"', re.IGNORECASE)
+BREADCRUMB_BLOCK_RE = re.compile(r'<div[^>]+class="breadcrumbs"[^>]*>([\s\S]*?)</div>', re.IGNORECASE)
+BREADCRUMB_NAME_RE = re.compile(r"itemprop='name'>([^<]+)<", re.IGNORECASE)
+ITEM_DESCRIPTION_RE = re.compile(r'<div[^>]+class="item-description"[^>]*>([\s\S]*?)</div>', re.IGNORECASE)
+P_RE = re.compile(r"<p[^>]*>([\s\S]*?)</p>", re.IGNORECASE)
+PRICE_META_RE = re.compile(r'<meta[^>]+itemprop="price"[^>]+content="([0-9]+(?:\.[0-9]+)?)"', re.IGNORECASE)
+CURRENCY_META_RE = re.compile(r'<meta[^>]+itemprop="priceCurrency"[^>]+content="([A-Z]{3})"', re.IGNORECASE)
+SKU_META_RE = re.compile(r'<meta[^>]+itemprop="sku"[^>]+content="([^"]+)"', re.IGNORECASE)
+SKU_DIV_RE = re.compile(r'<div[^>]+class="productcode"[^>]*>([^<]+)</div>', re.IGNORECASE)
+# Bitrix offer properties: 'SIZE_1C':{...,'VALUE':'42'}. One alternation covers all four keys;
+# the closing quote is a lookahead so a value's closing quote can still open the next key.
+BITRIX_PROP_RE = re.compile(
+    r"'(?:(?P<size>SIZE_1C|SIZES)|(?P<color>COLOR_1C)|(?P<code>COLOR_CODE_1C))':\{[^{}]*?'VALUE':'(?P<value>[^']*)(?=')",
+    re.IGNORECASE,
+)
+# Image candidates: group 1 is a src / data-src / href value, group 2 a srcset value.
+IMAGE_ATTR_RE = re.compile(r'(?:src|data-src|href)="([^"]+)"|srcset="([^"]+)"', re.IGNORECASE)
+# Only these characters can change bracket depth or string state in a JS literal.
+JS_TOKEN_RE = re.compile(r"""[{}'"\\]""")
+
+
+@lru_cache(maxsize=32)
+def meta_re(attr: str, key: str) -> re.Pattern[str]:
+    return re.compile(
+        rf"<meta[^>]*{attr}\s*=\s*\"{re.escape(key)}\"[^>]*content\s*=\s*\"([^\"]*)\"",
+        re.IGNORECASE,
+    )
+
+
+@lru_cache(maxsize=32)
+def text_block_re(class_name: str) -> re.Pattern[str]:
+    return re.compile(
+        rf'<div[^>]+class="{re.escape(class_name)}"[^>]*>([\s\S]*?)</div>',
+        re.IGNORECASE,
+    )
+
 
 def normalize_space(value: str) -> str:
-    return re.sub(r"\s+", " ", str(value or "")).strip()
+    s = value if isinstance(value, str) else str(value or "")
+    # Fast path: the only whitespace a printable string can hold is " ", so without a double
+    # space there is nothing to collapse.
+    if "  " not in s and s.isprintable():
+        return s.strip()
+    return WS_RE.sub(" ", s).strip()
+
+
+def drop_blocks(value: str, open_re: re.Pattern[str], close_re: re.Pattern[str]) -> str:
+    """
+    Replace every open_re ... close_re block with a single space.
+
+    Same result as a lazy `<script.*?</script>` regex sub, but a single
+    forward scan: once no closing tag is left we stop, instead of re-scanning to
+    the end of the string from every later opener (quadratic on unterminated
+    <script> soup).
+    """
+    out: List[str] = []
+    pos = 0
+    while True:
+        m_open = open_re.search(value, pos)
+        if not m_open:
+            break
+        m_close = close_re.search(value, m_open.end())
+        if not m_close:
+            break
+        out.append(value[pos : m_open.start()])
+        out.append(" ")
+        pos = m_close.end()
+    if not out:
+        return value
+    out.append(value[pos:])
+    return "".join(out)
 
 
 def strip_tags(value: str) -> str:
-    value = re.sub(r"<script[\s\S]*?</script>", " ", value, flags=re.IGNORECASE)
-    value = re.sub(r"<style[\s\S]*?</style>", " ", value, flags=re.IGNORECASE)
-    value = re.sub(r"<[^>]+>", " ", value)
+    if "<" in value:
+        value = drop_blocks(value, SCRIPT_OPEN_RE, SCRIPT_CLOSE_RE)
+        value = drop_blocks(value, STYLE_OPEN_RE, STYLE_CLOSE_RE)
+        value = TAG_RE.sub(" ", value)
     return normalize_space(html.unescape(value))
 
 
 def safe_filename(value: str) -> str:
-    out = re.sub(r"[^a-zA-Z0-9._-]+", "-", value.strip().lower())
-    out = re.sub(r"-+", "-", out).strip("-")
+    out = UNSAFE_FILENAME_RE.sub("-", value.strip().lower())
+    out = DASH_RUN_RE.sub("-", out).strip("-")
     return out or "item"
 
 
@@ -101,13 +200,76 @@ def parse_number(value: str) -> Optional[float]:
         return None
 
 
+def cell_number(value: Any) -> Optional[float]:
+    # xlrd hands numeric cells over as floats already; float(str(x)) == x, so skip the round trip.
+    if type(value) is float:
+        return value
+    return parse_number(str(value))
+
+
+# Product pages are fetched by a thread pool over the keep-alive HttpClient rather than an
+# event loop: the stdlib has no async HTTP client, and a worker blocked on a socket releases
+# the GIL, so threads already overlap the network waits. Past a few hundred concurrent
+# requests to one host the origin starts timing out instead of answering faster.
+MAX_FETCH_WORKERS = 256
+
+_MAX_REDIRECTS = 5
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Errors that mean a kept-alive connection was closed by the server between requests.
+_STALE_CONN_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# Exponential backoff between retries: base * 2**attempt, capped, plus up to 50% jitter so
+# parallel workers hitting the same 429/503 do not retry in lockstep.
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_JITTER = 0.5
+
+
+def retry_delay(attempt: int, exc: Exception) -> float:
+    if isinstance(exc, HTTPError) and exc.headers is not None:
+        retry_after = (exc.headers.get("Retry-After") or "").strip()
+        if retry_after.isdigit():
+            return min(RETRY_MAX_DELAY, float(retry_after))
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2**attempt))
+    return delay * (1 + random.random() * RETRY_JITTER)
+
+
+def is_retryable(exc: Exception) -> bool:
+    # 4xx (except 429 Too Many Requests) will not change on retry.
+    if isinstance(exc, HTTPError):
+        return exc.code == 429 or exc.code >= 500
+    return True
+
+
 class HttpClient:
-    def __init__(self, timeout: float, retries: int, delay: float, use_curl_fallback: bool) -> None:
+    def __init__(
+        self,
+        timeout: float,
+        retries: int,
+        delay: float,
+        use_curl_fallback: bool,
+        max_per_host: int = 0,
+    ) -> None:
         self.timeout = timeout
         self.retries = retries
         self.delay = delay
         self.use_curl_fallback = use_curl_fallback
-        self.opener = build_opener()
+        # Cap on requests in flight to one host across all threads (0 = no cap), so raising
+        # --fetch-workers or the image workers cannot push the origin into timing out.
+        self.max_per_host = max_per_host
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        # Idle keep-alive connections per (scheme, host), shared by all threads. A worker checks
+        # one out per request and returns it afterwards, so connections opened while reading the
+        # sitemap are reused by the page and image pools instead of dying with their threads.
+        # The pool never holds more connections than there were concurrent requests.
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._idle_lock = threading.Lock()
+
+    def with_settings(self, retries: int, delay: float) -> "HttpClient":
+        """Return a client with other retry/delay settings that shares this one's idle connections."""
+        other = copy.copy(self)
+        other.retries = retries
+        other.delay = delay
+        return other
 
     def _curl_fetch(self, url: str) -> bytes:
         # curl is often more robust across networks (IPv4/IPv6 issues, weird TLS middleboxes).
@@ -127,40 +289,165 @@ class HttpClient:
             raise RuntimeError(f"curl failed rc={proc.returncode}: {err[:300]}")
         return proc.stdout
 
-    def get_bytes(self, url: str) -> bytes:
+    def _host_slot(self, netloc: str) -> Optional[threading.BoundedSemaphore]:
+        if self.max_per_host <= 0:
+            return None
+        with self._idle_lock:
+            slot = self._host_slots.get(netloc)
+            if slot is None:
+                slot = self._host_slots[netloc] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _acquire(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        with self._idle_lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    def _release(self, scheme: str, netloc: str, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        """Return conn to the idle pool once resp has been read to the end."""
+        if resp.will_close:
+            conn.close()
+            return
+        with self._idle_lock:
+            self._idle.setdefault((scheme, netloc), []).append(conn)
+
+    def _send(self, url: str) -> Tuple[http.client.HTTPResponse, http.client.HTTPConnection, str, str]:
+        headers = {
+            "User-Agent": UA,
+            "Accept": "text/html,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Encoding": "gzip",
+        }
+        for _ in range(_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn = self._acquire(parts.scheme, parts.netloc)
+            reused = conn.sock is not None
+            try:
+                try:
+                    conn.request("GET", path, headers=headers)
+                    resp = conn.getresponse()
+                except _STALE_CONN_ERRORS:
+                    if not reused:
+                        raise
+                    conn.close()
+                    conn.request("GET", path, headers=headers)
+                    resp = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+
+            if resp.status in _REDIRECT_STATUSES and resp.getheader("Location"):
+                resp.read()
+                self._release(parts.scheme, parts.netloc, conn, resp)
+                url = urljoin(url, resp.getheader("Location") or "")
+                continue
+            if resp.status >= 400:
+                resp.read()
+                self._release(parts.scheme, parts.netloc, conn, resp)
+                raise HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            return resp, conn, parts.scheme, parts.netloc
+        raise URLError("too many redirects")
+
+    def _fetch_once(self, url: str, consume: Callable[[BinaryIO], T]) -> T:
+        resp, conn, scheme, netloc = self._send(url)
+        try:
+            if (resp.getheader("Content-Encoding") or "").lower() == "gzip":
+                data = consume(gzip.GzipFile(fileobj=resp))  # type: ignore[arg-type]
+                resp.read()
+            else:
+                data = consume(resp)  # type: ignore[arg-type]
+        except BaseException:
+            conn.close()
+            raise
+        self._release(scheme, netloc, conn, resp)
+        return data
+
+    def _request(self, url: str, consume: Callable[[BinaryIO], T]) -> T:
         last_exc: Optional[Exception] = None
+        # Held for the request itself only, not for the politeness delay or retry backoff.
+        slot = self._host_slot(urlsplit(url).netloc)
         for attempt in range(self.retries + 1):
             try:
-                req = Request(
-                    url,
-                    headers={
-                        "User-Agent": UA,
-                        "Accept": "text/html,application/xml;q=0.9,*/*;q=0.8",
-                    },
-                )
-                with self.opener.open(req, timeout=self.timeout) as resp:
-                    data = resp.read()
+                if slot is None:
+                    data = self._fetch_once(url, consume)
+                else:
+                    with slot:
+                        data = self._fetch_once(url, consume)
                 if self.delay > 0:
                     time.sleep(self.delay)
                 return data
-            except (HTTPError, URLError, TimeoutError, OSError) as exc:
+            except (HTTPError, URLError, TimeoutError, OSError, http.client.HTTPException) as exc:
                 last_exc = exc
+                if not is_retryable(exc):
+                    raise
                 if attempt < self.retries:
-                    time.sleep(min(2.5, 0.5 + attempt * 0.4))
+                    time.sleep(retry_delay(attempt, exc))
                     continue
                 # last attempt: optional curl fallback
                 if self.use_curl_fallback:
-                    return self._curl_fetch(url)
+                    return consume(io.BytesIO(self._curl_fetch(url)))
                 raise
         if last_exc:
             raise last_exc
         raise RuntimeError("unexpected fetch state")
 
+    def get_bytes(self, url: str) -> bytes:
+        return self._request(url, lambda resp: resp.read())
+
+    def download_file(self, url: str, dst: Path) -> None:
+        """Stream url into dst via a .part file, so an interrupted download never leaves a
+        non-empty dst behind (which would be skipped as already downloaded)."""
+        tmp = dst.with_name(dst.name + ".part")
+        try:
+            self._request(url, lambda resp: _copy_to_file(resp, tmp))
+            os.replace(tmp, dst)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
     def get_text(self, url: str) -> str:
         data = self.get_bytes(url)
         return data.decode("utf-8", "ignore")
 
 
+class ProgressReporter:
+    """
+    Print status() from a daemon thread every `interval` seconds while it keeps changing, so
+    the loop being reported on only bumps its counters instead of formatting and writing a
+    line itself.
+    """
+
+    def __init__(self, status: Callable[[], str], interval: float = 1.0) -> None:
+        self.status = status
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        last = ""
+        while not self._stop.wait(self.interval):
+            line = self.status()
+            if line != last:
+                print(line)
+                last = line
+
+    def __enter__(self) -> "ProgressReporter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _copy_to_file(resp: BinaryIO, path: Path) -> None:
+    with path.open("wb") as fp:
+        shutil.copyfileobj(resp, fp, 1 << 16)
+
+
 @dataclass
 class ArticleSeed:
     style: str
@@ -192,7 +479,7 @@ class ArticleSeed:
 def parse_xls_articles(path: Path) -> List[ArticleSeed]:
     wb = xlrd.open_workbook(str(path))
     sh = wb.sheet_by_index(0)
-    headers = [str(sh.cell_value(0, c)).strip() for c in range(sh.ncols)]
+    headers = [str(v).strip() for v in sh.row_values(0)]
     idx = {h: i for i, h in enumerate(headers)}
 
     required = [
@@ -227,123 +514,115 @@ def parse_xls_articles(path: Path) -> List[ArticleSeed]:
 
     by_style: Dict[str, Dict[str, Any]] = {}
 
-    def add_set(bucket: Dict[str, Set[str]], key: str, value: str) -> None:
-        val = normalize_space(value)
-        if not val:
-            return
-        bucket.setdefault(key, set()).add(val)
-
-    for r in range(1, sh.nrows):
-        style = normalize_space(sh.cell_value(r, idx["Style"]))
+    # (ArticleSeed field, XLS column) for every per-style value set.
+    set_columns = [
+        ("invoice_numbers", "Invoice Number"),
+        ("invoice_dates", "Invoice Date"),
+        ("ddt_numbers", "Ddt Number"),
+        ("ddt_dates", "Ddt Date"),
+        ("season_years", "Season year"),
+        ("currency", "Currency"),
+        ("made_in", "Made In"),
+        ("brand", "Brand"),
+        ("item_descriptions", "Item Description"),
+        ("composition_fabric", "Composition Fabric"),
+        ("composition_description", "Composition Description"),
+        ("composition_details", "Composition Details"),
+        ("customs_codes", "Customs Code"),
+        ("sizes", "Sizing"),
+        ("var_comm_codes", "Var Comm"),
+        ("var_descriptions", "Var Description OE"),
+        ("eans", "Ean Code"),
+    ]
+    set_keys = [key for key, _ in set_columns]
+
+    # Pull each needed column once (one xlrd call per column instead of one per cell) and walk
+    # the rows as tuples.
+    def column(name: str) -> List[Any]:
+        return sh.col_values(idx[name], start_rowx=1)
+
+    set_rows = zip(*[column(col) for _, col in set_columns])
+    for raw_style, raw_cs, raw_name, qta, net_amount, unit_price, unit_weight, set_values in zip(
+        column("Style"),
+        column("Commercial Style"),
+        column("Name"),
+        column("Qta"),
+        column("Total Net Amount"),
+        column("Unit Cost Price"),
+        column("Weigth"),
+        set_rows,
+    ):
+        style = normalize_space(raw_style)
         if not style:
             continue
 
-        bucket = by_style.setdefault(
-            style,
-            {
+        bucket = by_style.get(style)
+        if bucket is None:
+            bucket = by_style[style] = {
                 "style": style,
-                "commercial_style": normalize_space(sh.cell_value(r, idx["Commercial Style"])),
-                "name": normalize_space(sh.cell_value(r, idx["Name"])),
-                "sets": {},
+                "commercial_style": normalize_space(raw_cs),
+                "name": normalize_space(raw_name),
+                # One dict-with-None-values per set column, in set_columns order: cheaper to
+                # fill than sets, and sorted() reads the keys directly.
+                "sets": [{} for _ in set_columns],
                 "qty": 0,
                 "net": 0.0,
-                "unit_cost_prices": set(),
-                "unit_weights": set(),
-            },
-        )
+                # Raw values; rounded once per distinct value when the seeds are built.
+                "unit_cost_prices": {},
+                "unit_weights": {},
+            }
+
+        for values, raw in zip(bucket["sets"], set_values):
+            val = normalize_space(str(raw))
+            if val:
+                values[val] = None
 
-        sets: Dict[str, Set[str]] = bucket["sets"]
-        add_set(sets, "invoice_numbers", str(sh.cell_value(r, idx["Invoice Number"])) )
-        add_set(sets, "invoice_dates", str(sh.cell_value(r, idx["Invoice Date"])) )
-        add_set(sets, "ddt_numbers", str(sh.cell_value(r, idx["Ddt Number"])) )
-        add_set(sets, "ddt_dates", str(sh.cell_value(r, idx["Ddt Date"])) )
-        add_set(sets, "season_years", str(sh.cell_value(r, idx["Season year"])) )
-        add_set(sets, "currency", str(sh.cell_value(r, idx["Currency"])) )
-        add_set(sets, "made_in", str(sh.cell_value(r, idx["Made In"])) )
-        add_set(sets, "brand", str(sh.cell_value(r, idx["Brand"])) )
-        add_set(sets, "item_descriptions", str(sh.cell_value(r, idx["Item Description"])) )
-        add_set(sets, "composition_fabric", str(sh.cell_value(r, idx["Composition Fabric"])) )
-        add_set(sets, "composition_description", str(sh.cell_value(r, idx["Composition Description"])) )
-        add_set(sets, "composition_details", str(sh.cell_value(r, idx["Composition Details"])) )
-        add_set(sets, "customs_codes", str(sh.cell_value(r, idx["Customs Code"])) )
-        add_set(sets, "sizes", str(sh.cell_value(r, idx["Sizing"])) )
-        add_set(sets, "var_comm_codes", str(sh.cell_value(r, idx["Var Comm"])) )
-        add_set(sets, "var_descriptions", str(sh.cell_value(r, idx["Var Description OE"])) )
-        add_set(sets, "eans", str(sh.cell_value(r, idx["Ean Code"])) )
-
-        q = parse_number(str(sh.cell_value(r, idx["Qta"]))) or 0.0
-        net = parse_number(str(sh.cell_value(r, idx["Total Net Amount"]))) or 0.0
-        price = parse_number(str(sh.cell_value(r, idx["Unit Cost Price"])))
-        weight = parse_number(str(sh.cell_value(r, idx["Weigth"])))
+        q = cell_number(qta) or 0.0
+        net = cell_number(net_amount) or 0.0
+        price = cell_number(unit_price)
+        weight = cell_number(unit_weight)
 
         bucket["qty"] += int(round(q))
         bucket["net"] += float(net)
         if price is not None:
-            bucket["unit_cost_prices"].add(round(float(price), 4))
+            bucket["unit_cost_prices"][price] = None
         if weight is not None:
-            bucket["unit_weights"].add(round(float(weight), 4))
-
-    out: List[ArticleSeed] = []
-    for _, item in sorted(by_style.items()):
-        sets = item["sets"]
-        out.append(
-            ArticleSeed(
-                style=item["style"],
-                commercial_style=item["commercial_style"],
-                name=item["name"],
-                invoice_numbers=sorted(sets.get("invoice_numbers", set())),
-                invoice_dates=sorted(sets.get("invoice_dates", set())),
-                ddt_numbers=sorted(sets.get("ddt_numbers", set())),
-                ddt_dates=sorted(sets.get("ddt_dates", set())),
-                season_years=sorted(sets.get("season_years", set())),
-                currency=sorted(sets.get("currency", set())),
-                made_in=sorted(sets.get("made_in", set())),
-                brand=sorted(sets.get("brand", set())),
-                item_descriptions=sorted(sets.get("item_descriptions", set())),
-                composition_fabric=sorted(sets.get("composition_fabric", set())),
-                composition_description=sorted(sets.get("composition_description", set())),
-                composition_details=sorted(sets.get("composition_details", set())),
-                customs_codes=sorted(sets.get("customs_codes", set())),
-                sizes=sorted(sets.get("sizes", set())),
-                var_comm_codes=sorted(sets.get("var_comm_codes", set())),
-                var_descriptions=sorted(sets.get("var_descriptions", set())),
-                eans=sorted(sets.get("eans", set())),
-                total_qty=item["qty"],
-                total_net_amount=round(item["net"], 2),
-                unit_cost_prices=sorted(item["unit_cost_prices"]),
-                unit_weights=sorted(item["unit_weights"]),
-            )
+            bucket["unit_weights"][weight] = None
+
+    # Style keys are unique, so sorting the keys alone orders the same way as sorting items.
+    return [
+        ArticleSeed(
+            style=item["style"],
+            commercial_style=item["commercial_style"],
+            name=item["name"],
+            total_qty=item["qty"],
+            total_net_amount=round(item["net"], 2),
+            unit_cost_prices=sorted({round(v, 4) for v in item["unit_cost_prices"]}),
+            unit_weights=sorted({round(v, 4) for v in item["unit_weights"]}),
+            **{key: sorted(values) for key, values in zip(set_keys, item["sets"])},
         )
-    return out
+        for item in map(by_style.__getitem__, sorted(by_style))
+    ]
 
 
-def parse_sitemap_urls(client: HttpClient) -> List[str]:
+def parse_sitemap_urls(client: HttpClient, workers: int = 1) -> List[str]:
     index_url = "https://www.online-fashion.ru/sitemap/online-fashion.ru/product.xml"
     xml = client.get_text(index_url)
-    part_urls = re.findall(
-        r"<loc>(https://www\.online-fashion\.ru/sitemap/online-fashion\.ru/product\.part\d+\.xml)</loc>",
-        xml,
-    )
+    part_urls = SITEMAP_PART_RE.findall(xml)
     all_urls: List[str] = []
-    for p in part_urls:
-        px = client.get_text(p)
-        urls = re.findall(r"<loc>(https://www\.online-fashion\.ru/product/[^<]+)</loc>", px)
-        all_urls.extend(urls)
-    # keep only Max Mara lines
-    mm = [
-        u
-        for u in all_urls
-        if "max-mara" in u.lower() or "s-max-mara" in u.lower() or "max-mara-weekend" in u.lower()
-    ]
-    # de-dup
-    seen = set()
-    out: List[str] = []
-    for u in mm:
-        if u in seen:
-            continue
-        seen.add(u)
-        out.append(u)
-    return out
+    # Parts are fetched concurrently; map() keeps sitemap order so the index is stable.
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(part_urls) or 1))) as ex:
+        for px in ex.map(client.get_text, part_urls):
+            urls = SITEMAP_MM_PRODUCT_RE.findall(px)
+            all_urls.extend(urls)
+    # de-dup in first-seen order
+    return list(dict.fromkeys(all_urls))
+
+
+@lru_cache(maxsize=None)
+def page_slug(url: str) -> str:
+    """Directory name for a product page's images; the same page is shared by many articles."""
+    return safe_filename(urlparse(url).path.strip("/").replace("/", "-"))
 
 
 def slug_segments(url: str) -> List[str]:
@@ -411,73 +690,120 @@ def var_code_match(var_codes: List[str], segments: List[str]) -> bool:
     return any(seg in valid for seg in segments)
 
 
-def pick_candidates(article: ArticleSeed, url_index: List[str]) -> Tuple[List[str], List[str]]:
-    name = article.name.lower().strip()
-    model_hits: List[str] = []
-
-    for u in url_index:
-        segs = slug_segments(u)
-        if model_token_match(name, segs):
-            model_hits.append(u)
+class UrlTokenIndex:
+    """
+    Sitemap URLs with their slug segments split once, plus an inverted index from
+    brand-stripped slug token to URL positions, so matching an article no longer
+    re-parses every URL.
+    """
 
-    if not model_hits:
+    # Bump when slug_segments/strip_brand_prefix change, so cached indexes are rebuilt.
+    VERSION = 1
+
+    def __init__(
+        self,
+        urls: List[str],
+        segments: Optional[List[List[str]]] = None,
+        postings: Optional[Dict[str, List[int]]] = None,
+    ) -> None:
+        self.urls = urls
+        self._hits: Dict[str, List[int]] = {}
+        if segments is not None and postings is not None:
+            self.segments = segments
+            self.postings = postings
+            return
+        self.segments = []
+        self.postings = {}
+        for i, u in enumerate(urls):
+            segs = slug_segments(u)
+            self.segments.append(segs)
+            for s in dict.fromkeys(strip_brand_prefix(segs)):
+                self.postings.setdefault(s, []).append(i)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"version": self.VERSION, "segments": self.segments, "postings": self.postings}
+
+    @classmethod
+    def from_json(cls, urls: List[str], data: Any) -> Optional["UrlTokenIndex"]:
+        """Rebuild from to_json() output; None if data is missing, stale or does not fit urls."""
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return None
+        segments = data.get("segments")
+        postings = data.get("postings")
+        if not isinstance(segments, list) or len(segments) != len(urls) or not isinstance(postings, dict):
+            return None
+        return cls(urls, segments, postings)
+
+    def model_hits(self, name: str) -> List[int]:
+        """Positions (in URL order) of the URLs for which model_token_match(name, ...) holds."""
+        token = name.lower().strip()
+        if not token:
+            return []
+        hits = self._hits.get(token)
+        if hits is not None:
+            return hits
+        if len(token) >= 5:
+            # The substring fallback also covers the exact and prefixed forms.
+            matched = [s for s in self.postings if token in s]
+        else:
+            matched = [s for s in (token, *(p + token for p in MODEL_PREFIXES)) if s in self.postings]
+        positions: Set[int] = set()
+        for s in matched:
+            positions.update(self.postings[s])
+        hits = self._hits[token] = sorted(positions)
+        return hits
+
+
+def pick_candidates(article: ArticleSeed, url_index: UrlTokenIndex) -> Tuple[List[str], List[str]]:
+    positions = url_index.model_hits(article.name)
+    if not positions:
         return [], []
 
-    exact_color = [u for u in model_hits if var_code_match(article.var_comm_codes, slug_segments(u))]
+    urls = url_index.urls
+    model_hits = [urls[i] for i in positions]
+    exact_color = [urls[i] for i in positions if var_code_match(article.var_comm_codes, url_index.segments[i])]
     return exact_color, model_hits
 
 
 def extract_meta(html_text: str, key: str, attr: str = "name") -> Optional[str]:
-    m = re.search(
-        rf"<meta[^>]*{attr}\s*=\s*\"{re.escape(key)}\"[^>]*content\s*=\s*\"([^\"]*)\"",
-        html_text,
-        re.IGNORECASE,
-    )
+    m = meta_re(attr, key).search(html_text)
     if not m:
         return None
     return normalize_space(html.unescape(m.group(1)))
 
 
 def extract_title(html_text: str) -> Optional[str]:
-    m = re.search(r"<title[^>]*>([\s\S]*?)</title>", html_text, re.IGNORECASE)
+    m = TITLE_RE.search(html_text)
     if not m:
         return None
     return normalize_space(html.unescape(m.group(1)))
 
 
 def extract_canonical(html_text: str) -> Optional[str]:
-    m = re.search(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"', html_text, re.IGNORECASE)
+    m = CANONICAL_RE.search(html_text)
     if not m:
         return None
     return normalize_space(m.group(1))
 
 
 def extract_breadcrumbs(html_text: str) -> List[str]:
-    block = re.search(r'<div[^>]+class="breadcrumbs"[^>]*>([\s\S]*?)</div>', html_text, re.IGNORECASE)
+    block = BREADCRUMB_BLOCK_RE.search(html_text)
     if not block:
         return []
-    vals = re.findall(r"itemprop='name'>([^<]+)<", block.group(1), re.IGNORECASE)
+    vals = BREADCRUMB_NAME_RE.findall(block.group(1))
     out = [normalize_space(html.unescape(v)) for v in vals if normalize_space(v)]
     return out
 
 
 def extract_text_block(html_text: str, class_name: str) -> Optional[str]:
-    m = re.search(
-        rf'<div[^>]+class="{re.escape(class_name)}"[^>]*>([\s\S]*?)</div>',
-        html_text,
-        re.IGNORECASE,
-    )
+    m = text_block_re(class_name).search(html_text)
     if not m:
         return None
     return strip_tags(m.group(1))
 
 
 def extract_item_description_html(html_text: str) -> Optional[str]:
-    m = re.search(
-        r'<div[^>]+class="item-description"[^>]*>([\s\S]*?)</div>',
-        html_text,
-        re.IGNORECASE,
-    )
+    m = ITEM_DESCRIPTION_RE.search(html_text)
     if not m:
         return None
     return normalize_space(m.group(1))
@@ -487,7 +813,7 @@ def extract_detail_lines(html_text: str) -> List[str]:
     m = extract_item_description_html(html_text)
     if not m:
         return []
-    lines = re.findall(r"<p[^>]*>([\s\S]*?)</p>", m, re.IGNORECASE)
+    lines = P_RE.findall(m)
     out = []
     for line in lines:
         txt = strip_tags(line)
@@ -500,9 +826,9 @@ def extract_detail_lines(html_text: str) -> List[str]:
 
 
 def extract_prices(html_text: str) -> Tuple[List[float], Optional[str]]:
-    price_strs = re.findall(r'<meta[^>]+itemprop="price"[^>]+content="([0-9]+(?:\.[0-9]+)?)"', html_text, re.IGNORECASE)
+    price_strs = PRICE_META_RE.findall(html_text)
     currency = None
-    m_curr = re.search(r'<meta[^>]+itemprop="priceCurrency"[^>]+content="([A-Z]{3})"', html_text, re.IGNORECASE)
+    m_curr = CURRENCY_META_RE.search(html_text)
     if m_curr:
         currency = m_curr.group(1)
     prices = sorted({float(p) for p in price_strs})
@@ -510,50 +836,58 @@ def extract_prices(html_text: str) -> Tuple[List[float], Optional[str]]:
 
 
 def extract_sku(html_text: str) -> Optional[str]:
-    m = re.search(r'<meta[^>]+itemprop="sku"[^>]+content="([^"]+)"', html_text, re.IGNORECASE)
+    m = SKU_META_RE.search(html_text)
     if m:
         return normalize_space(m.group(1))
-    m2 = re.search(r'<div[^>]+class="productcode"[^>]*>([^<]+)</div>', html_text, re.IGNORECASE)
+    m2 = SKU_DIV_RE.search(html_text)
     if m2:
         return normalize_space(m2.group(1))
     return None
 
 
-def extract_sizes(html_text: str) -> List[str]:
-    vals = []
-    vals.extend(re.findall(r"'SIZE_1C':\{[^{}]*?'VALUE':'([^']*)'", html_text, re.IGNORECASE))
-    vals.extend(re.findall(r"'SIZES':\{[^{}]*?'VALUE':'([^']*)'", html_text, re.IGNORECASE))
-    out = sorted({normalize_space(v) for v in vals if normalize_space(v)})
-    return out
-
-
-def extract_colors(html_text: str) -> Tuple[List[str], List[str]]:
-    color_names = re.findall(r"'COLOR_1C':\{[^{}]*?'VALUE':'([^']*)'", html_text, re.IGNORECASE)
-    color_codes = re.findall(r"'COLOR_CODE_1C':\{[^{}]*?'VALUE':'([^']*)'", html_text, re.IGNORECASE)
-    return (
-        sorted({normalize_space(v) for v in color_names if normalize_space(v)}),
-        sorted({normalize_space(v) for v in color_codes if normalize_space(v)}),
-    )
+def extract_bitrix_props(html_text: str) -> Tuple[List[str], List[str], List[str]]:
+    """Sizes, color names and color codes from the Bitrix offer properties, in one scan."""
+    sizes: Set[str] = set()
+    colors: Set[str] = set()
+    codes: Set[str] = set()
+    for m in BITRIX_PROP_RE.finditer(html_text):
+        val = normalize_space(m.group("value"))
+        if not val:
+            continue
+        if m.group("size") is not None:
+            sizes.add(val)
+        elif m.group("color") is not None:
+            colors.add(val)
+        else:
+            codes.add(val)
+    return sorted(sizes), sorted(colors), sorted(codes)
 
 
 def extract_collection_and_composition(detail_lines: List[str]) -> Dict[str, Any]:
-    data: Dict[str, Any] = {
-        "collection": None,
-        "composition_text": None,
-        "care_text": None,
-        "model_params": None,
-    }
+    # First line mentioning each field wins. The None checks go first so a field that is
+    # already set costs no substring scans, and the loop stops once all four are found.
+    collection: Optional[str] = None
+    composition: Optional[str] = None
+    care: Optional[str] = None
+    model_params: Optional[str] = None
     for ln in detail_lines:
         l = ln.lower()
-        if "новая коллекция" in l and data["collection"] is None:
-            data["collection"] = normalize_space(ln)
-        if ("состав" in l or "fabric" in l) and data["composition_text"] is None:
-            data["composition_text"] = normalize_space(ln)
-        if ("уход" in l or "care" in l) and data["care_text"] is None:
-            data["care_text"] = normalize_space(ln)
-        if ("параметры фотомодели" in l or "рост" in l) and data["model_params"] is None:
-            data["model_params"] = normalize_space(ln)
-    return data
+        if collection is None and "новая коллекция" in l:
+            collection = normalize_space(ln)
+        if composition is None and ("состав" in l or "fabric" in l):
+            composition = normalize_space(ln)
+        if care is None and ("уход" in l or "care" in l):
+            care = normalize_space(ln)
+        if model_params is None and ("параметры фотомодели" in l or "рост" in l):
+            model_params = normalize_space(ln)
+        if collection is not None and composition is not None and care is not None and model_params is not None:
+            break
+    return {
+        "collection": collection,
+        "composition_text": composition,
+        "care_text": care,
+        "model_params": model_params,
+    }
 
 
 def classify_image(url: str) -> str:
@@ -579,24 +913,28 @@ def classify_image(url: str) -> str:
 
 def extract_images(html_text: str, base_url: str) -> List[Dict[str, str]]:
     cands: List[str] = []
-    # src / data-src / href
-    cands.extend(re.findall(r'(?:src|data-src|href)="([^"]+)"', html_text, re.IGNORECASE))
-    # srcset values
-    for srcset in re.findall(r'srcset="([^"]+)"', html_text, re.IGNORECASE):
+    srcset_cands: List[str] = []
+    for src, srcset in IMAGE_ATTR_RE.findall(html_text):
+        if src:
+            cands.append(src)
+            continue
         for part in srcset.split(","):
-            u = normalize_space(part.split(" ")[0])
+            u = normalize_space(part.partition(" ")[0])
             if u:
-                cands.append(u)
+                srcset_cands.append(u)
+    # srcset entries rank after every src / data-src / href value for the de-dup below.
+    cands.extend(srcset_cands)
 
     out: List[Dict[str, str]] = []
     seen = set()
     for u in cands:
         if not IMAGE_EXT_RE.search(u):
             continue
-        abs_url = urljoin(base_url, u)
+        # Most candidates are already absolute; urljoin is only needed for relative paths.
+        abs_url = u if u.startswith(("https://", "http://")) else urljoin(base_url, u)
         if "/upload/" not in abs_url:
             continue
-        no_q = abs_url.split("?", 1)[0]
+        no_q = abs_url.partition("?")[0]
         key = no_q
         if key in seen:
             continue
@@ -624,52 +962,45 @@ def extract_js_object_literal(page_html: str, marker: str) -> Optional[str]:
     if start_marker < 0:
         return None
 
-    idx = start_marker + len(marker)
-    length = len(page_html)
-
     # Find first '{'
-    while idx < length and page_html[idx] != "{":
-        idx += 1
-    if idx >= length or page_html[idx] != "{":
+    idx = page_html.find("{", start_marker + len(marker))
+    if idx < 0:
         return None
 
-    open_ch = "{"
-    close_ch = "}"
+    # Jump between interesting characters with the regex engine instead of
+    # stepping through every character of the (often ~100KB) page in Python.
+    search = JS_TOKEN_RE.search
     depth = 0
-    in_string = False
-    escaped = False
     quote_char = ""
-
-    for pos in range(idx, length):
-        ch = page_html[pos]
-
-        if in_string:
-            if escaped:
-                escaped = False
-                continue
+    pos = idx
+    while True:
+        m = search(page_html, pos)
+        if not m:
+            return None
+        ch = m.group()
+        pos = m.end()
+
+        if quote_char:
             if ch == "\\":
-                escaped = True
-                continue
-            if ch == quote_char:
-                in_string = False
+                # skip the escaped character, whatever it is
+                pos += 1
+            elif ch == quote_char:
                 quote_char = ""
             continue
 
-        if ch in ("'", '"'):
-            in_string = True
-            quote_char = ch
-            continue
-
-        if ch == open_ch:
+        if ch == "{":
             depth += 1
-            continue
-
-        if ch == close_ch:
+        elif ch == "}":
             depth -= 1
             if depth == 0:
-                return page_html[idx : pos + 1]
+                return page_html[idx:pos]
+        elif ch != "\\":
+            quote_char = ch
 
-    return None
+
+# Bump when parse_product_page (or anything it calls) changes shape or content, so pages parsed
+# by older code are not reused from parsed_pages_cache.json.
+PARSED_PAGES_VERSION = 1
 
 
 def parse_product_page(url: str, html_text: str) -> Dict[str, Any]:
@@ -686,8 +1017,7 @@ def parse_product_page(url: str, html_text: str) -> Dict[str, Any]:
     detail_lines = extract_detail_lines(html_text)
     detail_text = "\n".join(detail_lines)
     extracted = extract_collection_and_composition(detail_lines)
-    sizes = extract_sizes(html_text)
-    color_names, color_codes = extract_colors(html_text)
+    sizes, color_names, color_codes = extract_bitrix_props(html_text)
     images = extract_images(html_text, url)
 
     short_desc = og_desc or meta_desc
@@ -741,8 +1071,7 @@ def download_images(
     failed = 0
 
     for page in pages:
-        page_slug = safe_filename(urlparse(page["url"]).path.strip("/").replace("/", "-"))
-        page_dir = target_root / page_slug
+        page_dir = target_root / page_slug(page["url"])
         page_dir.mkdir(parents=True, exist_ok=True)
 
         for img in page.get("images", []):
@@ -752,8 +1081,7 @@ def download_images(
                 skipped += 1
                 continue
             try:
-                data = client.get_bytes(img["url"])
-                dst.write_bytes(data)
+                client.download_file(img["url"], dst)
                 downloaded += 1
             except Exception:
                 failed += 1
@@ -772,122 +1100,239 @@ def download_images_from_json(
     workers: int,
     overwrite: bool,
 ) -> Dict[str, Any]:
-    data = json.loads(article_cards_json.read_text(encoding="utf-8"))
+    rows = json.loads(article_cards_json.read_text(encoding="utf-8"))
+    return download_images_from_rows(client, rows, out_dir, workers, overwrite)
+
+
+def download_images_from_rows(
+    client: HttpClient,
+    rows: List[Dict[str, Any]],
+    out_dir: Path,
+    workers: int,
+    overwrite: bool,
+) -> Dict[str, Any]:
+    images_root = out_dir / "images" / "online-fashion"
+    errors_path = out_dir / "image_download_errors.json"
 
-    jobs: List[Tuple[str, str, str]] = []
-    # (dst_path, url, kind)
-    for row in data:
+    # dst_path -> (url, kind); the first job for a path wins.
+    dedup: Dict[str, Tuple[str, str]] = {}
+    for row in rows:
         style = str(row.get("style") or "")
         pages = (((row.get("site_data") or {}).get("pages")) or [])
         if not style or not pages:
             continue
+        style_dir = images_root / safe_filename(style)
         for page in pages:
-            page_url = str(page.get("url") or "")
-            page_slug = safe_filename(urlparse(page_url).path.strip("/").replace("/", "-"))
+            page_dir = style_dir / page_slug(str(page.get("url") or ""))
             for img in page.get("images", []) or []:
                 img_url = str(img.get("url") or "")
                 if not img_url:
                     continue
                 filename = f"{img.get('kind','other')}__{img.get('filename','img.webp')}"
-                dst = out_dir / "images" / "online-fashion" / safe_filename(style) / page_slug / filename
-                jobs.append((str(dst), img_url, str(img.get("kind") or "other")))
-
-    # De-dup by dst path
-    dedup: Dict[str, Tuple[str, str]] = {}
-    for dst, u, kind in jobs:
-        dedup.setdefault(dst, (u, kind))
+                dst = str(page_dir / filename)
+                if dst not in dedup:
+                    dedup[dst] = (img_url, str(img.get("kind") or "other"))
     items = list(dedup.items())
 
     downloaded = 0
     skipped = 0
     failed = 0
 
+    # Many images share a page directory: create each one once up front instead of per image.
+    for parent in dict.fromkeys(Path(dst_path).parent for dst_path, _ in items):
+        parent.mkdir(parents=True, exist_ok=True)
+
     def one(dst_path: str, url: str) -> Tuple[str, bool, Optional[str]]:
         dst = Path(dst_path)
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        if dst.exists() and dst.stat().st_size > 0 and not overwrite:
-            return dst_path, False, None
+        if not overwrite:
+            try:
+                if dst.stat().st_size > 0:
+                    return dst_path, False, None
+            except FileNotFoundError:
+                pass
         try:
-            data = client.get_bytes(url)
-            dst.write_bytes(data)
+            client.download_file(url, dst)
             return dst_path, True, None
         except Exception as exc:
             return dst_path, False, normalize_space(str(exc))
 
     errors: Dict[str, str] = {}
-    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
-        futures = []
-        for dst_path, (url, _kind) in items:
-            futures.append(ex.submit(one, dst_path, url))
-        for i, fut in enumerate(as_completed(futures), 1):
-            dst_path, did, err = fut.result()
-            if did:
-                downloaded += 1
-            else:
-                # Either skipped or failed; determine by err
-                if err:
-                    failed += 1
-                    errors[dst_path] = err
+    total = len(items)
+    workers = max(1, workers)
+    # Keep only a few jobs per worker queued: submitting every image up front holds one
+    # Future per image (hundreds of thousands on a full run) for the whole download.
+    window = workers * 4
+    pending: Set[Future[Tuple[str, bool, Optional[str]]]] = set()
+    queue = iter(items)
+    i = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex, ProgressReporter(
+        lambda: f"  images processed {i}/{total} (downloaded={downloaded}, failed={failed})..."
+    ):
+        while True:
+            for dst_path, (url, _kind) in islice(queue, window - len(pending)):
+                pending.add(ex.submit(one, dst_path, url))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i += 1
+                dst_path, did, err = fut.result()
+                if did:
+                    downloaded += 1
                 else:
-                    skipped += 1
-            if i % 200 == 0:
-                print(f"  images processed {i}/{len(futures)} (downloaded={downloaded}, failed={failed})...", flush=True)
+                    # Either skipped or failed; determine by err
+                    if err:
+                        failed += 1
+                        errors[dst_path] = err
+                    else:
+                        skipped += 1
 
     # Keep errors file for debugging
-    (out_dir / "image_download_errors.json").write_text(
-        json.dumps(errors, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    write_json(errors_path, errors)
 
     return {
         "image_jobs": len(items),
         "downloaded": downloaded,
         "skipped": skipped,
         "failed": failed,
-        "errors_json": str(out_dir / "image_download_errors.json"),
-        "root_dir": str(out_dir / "images" / "online-fashion"),
+        "errors_json": str(errors_path),
+        "root_dir": str(images_root),
+    }
+
+
+def build_article_row(a: ArticleSeed, cand: Dict[str, List[str]], chosen: List[str], pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # The article fields in declaration order; vars() copies the instance dict in C, where
+    # dataclasses.asdict would deep-copy every list.
+    row: Dict[str, Any] = dict(vars(a))
+    row["site_data"] = {
+        "site": "online-fashion.ru",
+        "candidate_urls": chosen,
+        "candidate_urls_exact_color": cand["exact_color"],
+        "candidate_urls_model_only": cand["model_hits"],
+        "best_match": pages[0] if pages else None,
+        "pages": pages,
+    }
+
+    row["download"] = {
+        "downloaded": 0,
+        "skipped": 0,
+        "failed": 0,
+        "dir": "",
     }
+    return row
+
+
+CSV_FIELDS = (
+    "style",
+    "commercial_style",
+    "name",
+    "invoice_numbers",
+    "ddt_numbers",
+    "season_years",
+    "made_in",
+    "xls_sizes",
+    "xls_colors",
+    "xls_var_codes",
+    "eans_count",
+    "total_qty",
+    "total_net_amount",
+    "matched",
+    "best_url",
+    "best_title",
+    "best_sku",
+    "best_prices",
+    "best_currency",
+    "best_short_description",
+    "best_detail_description",
+    "best_composition_line",
+    "best_care_line",
+    "best_collection_line",
+    "best_sizes",
+    "best_colors",
+    "best_color_codes",
+    "best_image_count",
+    "candidate_count",
+    "pages_parsed",
+    "image_dir",
+)
 
 
-def flatten_for_csv(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
+def iter_csv_rows(rows: List[Dict[str, Any]]) -> Iterable[Tuple[Any, ...]]:
+    """Yield one tuple per row in CSV_FIELDS order."""
+    join = "; ".join
     for row in rows:
         site = row.get("site_data", {})
         best = site.get("best_match") or {}
-        line = {
-            "style": row.get("style", ""),
-            "commercial_style": row.get("commercial_style", ""),
-            "name": row.get("name", ""),
-            "invoice_numbers": "; ".join(row.get("invoice_numbers", [])),
-            "ddt_numbers": "; ".join(row.get("ddt_numbers", [])),
-            "season_years": "; ".join(row.get("season_years", [])),
-            "made_in": "; ".join(row.get("made_in", [])),
-            "xls_sizes": "; ".join(row.get("sizes", [])),
-            "xls_colors": "; ".join(row.get("var_descriptions", [])),
-            "xls_var_codes": "; ".join(row.get("var_comm_codes", [])),
-            "eans_count": len(row.get("eans", [])),
-            "total_qty": row.get("total_qty", 0),
-            "total_net_amount": row.get("total_net_amount", 0),
-            "matched": bool(best),
-            "best_url": best.get("url", ""),
-            "best_title": best.get("title", ""),
-            "best_sku": best.get("sku", ""),
-            "best_prices": "; ".join(str(p) for p in best.get("prices", [])),
-            "best_currency": best.get("currency", ""),
-            "best_short_description": best.get("short_description", ""),
-            "best_detail_description": best.get("detail_description", ""),
-            "best_composition_line": best.get("composition_line", ""),
-            "best_care_line": best.get("care_line", ""),
-            "best_collection_line": best.get("collection_line", ""),
-            "best_sizes": "; ".join(best.get("sizes", [])),
-            "best_colors": "; ".join(best.get("colors", [])),
-            "best_color_codes": "; ".join(best.get("color_codes", [])),
-            "best_image_count": best.get("image_count", 0),
-            "candidate_count": len(site.get("candidate_urls", [])),
-            "pages_parsed": len(site.get("pages", [])),
-            "image_dir": (row.get("download", {}) or {}).get("dir", ""),
-        }
-        out.append(line)
-    return out
+        yield (
+            row.get("style", ""),
+            row.get("commercial_style", ""),
+            row.get("name", ""),
+            join(row.get("invoice_numbers", [])),
+            join(row.get("ddt_numbers", [])),
+            join(row.get("season_years", [])),
+            join(row.get("made_in", [])),
+            join(row.get("sizes", [])),
+            join(row.get("var_descriptions", [])),
+            join(row.get("var_comm_codes", [])),
+            len(row.get("eans", [])),
+            row.get("total_qty", 0),
+            row.get("total_net_amount", 0),
+            bool(best),
+            best.get("url", ""),
+            best.get("title", ""),
+            best.get("sku", ""),
+            join(str(p) for p in best.get("prices", [])),
+            best.get("currency", ""),
+            best.get("short_description", ""),
+            best.get("detail_description", ""),
+            best.get("composition_line", ""),
+            best.get("care_line", ""),
+            best.get("collection_line", ""),
+            join(best.get("sizes", [])),
+            join(best.get("colors", [])),
+            join(best.get("color_codes", [])),
+            best.get("image_count", 0),
+            len(site.get("candidate_urls", [])),
+            len(site.get("pages", [])),
+            (row.get("download", {}) or {}).get("dir", ""),
+        )
+
+
+def write_json(path: Path, data: Any, compact: bool = False) -> None:
+    # compact drops indentation for machine-read artifacts, where it roughly doubles the bytes.
+    # Written to a temp file and renamed over path, so an interrupted run leaves the previous
+    # file (e.g. a cache the next cache-first run relies on) intact rather than truncated.
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as fp:
+            if compact:
+                # Only one-shot json.dumps without indent runs the C encoder; json.dump always
+                # falls back to the pure-Python one, which is ~2x slower on the large artifacts.
+                fp.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+            else:
+                # json.dump encodes straight into the file instead of building one big str.
+                json.dump(data, fp, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_cards_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    with path.open("w", encoding="utf-8", newline="") as fp:
+        w = csv.writer(fp)
+        w.writerow(CSV_FIELDS)
+        w.writerows(iter_csv_rows(rows))
+
+
+def write_unmatched_csv(path: Path, unmatched: List[Dict[str, Any]]) -> None:
+    with path.open("w", encoding="utf-8", newline="") as fp:
+        fields = ["style", "commercial_style", "name", "var_comm_codes", "var_descriptions"]
+        writer = csv.DictWriter(fp, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(unmatched)
 
 
 def main() -> None:
@@ -907,6 +1352,24 @@ def main() -> None:
     parser.add_argument("--retries", type=int, default=2)
     parser.add_argument("--delay", type=float, default=0.07)
     parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="parse product pages in this many processes while fetching continues (0 = parse in the fetching thread)",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=0,
+        help="concurrent product page fetches in stage [4/6] (0 = --workers); capped at %d" % MAX_FETCH_WORKERS,
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=int,
+        default=64,
+        help="max requests in flight to one host across all fetch/download threads (0 = no cap)",
+    )
     parser.add_argument("--overwrite-images", action="store_true")
     parser.add_argument("--curl-fallback", action="store_true", help="Use curl as fallback for network fetches")
     parser.add_argument(
@@ -915,18 +1378,34 @@ def main() -> None:
         default="cache-first",
         help="How to build URL index from sitemap. cache-first uses existing cache if present.",
     )
+    parser.add_argument(
+        "--pages-policy",
+        choices=["cache-first", "refresh", "cache-only"],
+        default="cache-first",
+        help="How to get product pages. cache-first reuses parsed pages younger than --pages-max-age-hours.",
+    )
+    parser.add_argument("--pages-max-age-hours", type=float, default=24.0)
     args = parser.parse_args()
 
     xls_path = Path(args.xls)
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    client = HttpClient(timeout=args.timeout, retries=args.retries, delay=args.delay, use_curl_fallback=bool(args.curl_fallback))
+    client = HttpClient(
+        timeout=args.timeout,
+        retries=args.retries,
+        delay=args.delay,
+        use_curl_fallback=bool(args.curl_fallback),
+        max_per_host=max(0, args.max_per_host),
+    )
 
     json_path = out_dir / "article_cards_full.json"
     csv_path = out_dir / "article_cards_full.csv"
     unmatched_path = out_dir / "article_cards_unmatched.csv"
     index_cache_path = out_dir / "online_fashion_url_index.json"
+    pages_cache_path = out_dir / "parsed_pages_cache.json"
+    run_summary_path = out_dir / "run_summary.json"
+    img_summary_path = out_dir / "image_download_summary.json"
 
     if args.mode in ("download-images", "all") and not json_path.exists():
         raise SystemExit(f"Missing {json_path}. Run with --mode extract first.")
@@ -934,12 +1413,7 @@ def main() -> None:
     if args.mode in ("download-images",):
         print("[download-images] Downloading images from JSON...", flush=True)
         # For images we want speed; override delay to 0 to avoid throttling ourselves.
-        img_client = HttpClient(
-            timeout=args.timeout,
-            retries=max(1, args.retries),
-            delay=0.0,
-            use_curl_fallback=bool(args.curl_fallback),
-        )
+        img_client = client.with_settings(retries=max(1, args.retries), delay=0.0)
         res = download_images_from_json(
             client=img_client,
             article_cards_json=json_path,
@@ -947,9 +1421,7 @@ def main() -> None:
             workers=max(4, args.workers),
             overwrite=args.overwrite_images,
         )
-        (out_dir / "image_download_summary.json").write_text(
-            json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
+        write_json(img_summary_path, res)
         print(json.dumps(res, ensure_ascii=False, indent=2), flush=True)
         return
 
@@ -960,12 +1432,11 @@ def main() -> None:
 
     print("[2/6] Build online-fashion URL index from sitemap...", flush=True)
     url_index: List[str] = []
-    used_cache = False
+    cached: Dict[str, Any] = {}
     if args.index_policy in ("cache-first", "cache-only") and index_cache_path.exists():
         try:
             cached = json.loads(index_cache_path.read_text(encoding="utf-8"))
             url_index = list(cached.get("urls") or [])
-            used_cache = True
             print(f"  using cached index: {index_cache_path} ({len(url_index)} urls)", flush=True)
         except Exception as exc:
             if args.index_policy == "cache-only":
@@ -973,22 +1444,33 @@ def main() -> None:
             print(f"  cache read failed, will refresh: {exc}", flush=True)
 
     if not url_index or args.index_policy == "refresh":
-        url_index = parse_sitemap_urls(client)
+        url_index = parse_sitemap_urls(client, workers=args.workers)
         print(f"  max mara product urls: {len(url_index)}", flush=True)
+        token_index = UrlTokenIndex(url_index)
         index_dump = {
             "generated_at": int(time.time()),
             "site": "online-fashion.ru",
             "url_count": len(url_index),
             "urls": url_index,
+            "token_index": token_index.to_json(),
         }
-        index_cache_path.write_text(json.dumps(index_dump, ensure_ascii=False, indent=2), encoding="utf-8")
-    elif used_cache:
+        # A cache, not a report: the token index would be mostly whitespace if indented.
+        write_json(index_cache_path, index_dump, compact=True)
+    else:
         print(f"  max mara product urls: {len(url_index)}", flush=True)
+        # The slug token index is stored next to the URLs, so cached runs skip re-splitting them.
+        loaded_index = UrlTokenIndex.from_json(url_index, cached.get("token_index"))
+        if loaded_index is None:
+            token_index = UrlTokenIndex(url_index)
+            cached["token_index"] = token_index.to_json()
+            write_json(index_cache_path, cached, compact=True)
+        else:
+            token_index = loaded_index
 
     print("[3/6] Match article -> candidate URLs...", flush=True)
     article_candidates: Dict[str, Dict[str, List[str]]] = {}
     for a in articles:
-        exact_color, model_hits = pick_candidates(a, url_index)
+        exact_color, model_hits = pick_candidates(a, token_index)
         article_candidates[a.style] = {
             "exact_color": exact_color,
             "model_hits": model_hits,
@@ -996,90 +1478,163 @@ def main() -> None:
 
     print("[4/6] Fetch + parse candidate product pages...", flush=True)
     # collect unique candidate URLs to fetch once
-    unique_candidate_urls: Set[str] = set()
+    # dict keys rather than a sorted set: deterministic (first-seen article order) without
+    # sorting tens of thousands of URLs just to iterate them once.
+    unique_candidate_urls: Dict[str, None] = {}
     for cand in article_candidates.values():
         chosen = cand["exact_color"] if cand["exact_color"] else cand["model_hits"]
-        unique_candidate_urls.update(chosen)
+        unique_candidate_urls.update(dict.fromkeys(chosen))
 
     parsed_pages: Dict[str, Dict[str, Any]] = {}
     fetch_errors: Dict[str, str] = {}
 
+    # url -> {"fetched_at": ts, "page": parsed page}; kept across runs so unchanged pages are
+    # neither fetched nor parsed again. A cache written by another PARSED_PAGES_VERSION is ignored.
+    pages_cache: Dict[str, Dict[str, Any]] = {}
+    if args.pages_policy in ("cache-first", "cache-only") and pages_cache_path.exists():
+        try:
+            cached = json.loads(pages_cache_path.read_text(encoding="utf-8"))
+            if cached.get("version") == PARSED_PAGES_VERSION:
+                pages_cache = dict(cached.get("pages") or {})
+            else:
+                print("  pages cache is from another parser version, ignoring it", flush=True)
+        except Exception as exc:
+            if args.pages_policy == "cache-only":
+                raise
+            print(f"  pages cache read failed, will refetch: {exc}", flush=True)
+    now = int(time.time())
+    max_age = args.pages_max_age_hours * 3600
+    to_fetch: List[str] = []
+    for u in unique_candidate_urls:
+        entry = pages_cache.get(u)
+        if entry is not None and (args.pages_policy == "cache-only" or now - int(entry.get("fetched_at") or 0) <= max_age):
+            parsed_pages[u] = entry["page"]
+        elif args.pages_policy == "cache-only":
+            fetch_errors[u] = "not in pages cache"
+        else:
+            to_fetch.append(u)
+    pages_from_cache = len(parsed_pages)
+    print(f"  pages from cache: {pages_from_cache}, to fetch: {len(to_fetch)}", flush=True)
+
+    # Each article's row is built as soon as the last of its candidate pages is in (fetched,
+    # parsed or failed), so row assembly overlaps the fetches still in flight instead of
+    # waiting behind the slowest page.
+    chosen_by_article: List[List[str]] = []
+    built_rows: List[Optional[Dict[str, Any]]] = [None] * len(articles)
+    remaining: List[int] = [0] * len(articles)
+    waiting_on: Dict[str, List[int]] = defaultdict(list)
+    parsed_pages_get = parsed_pages.get
+
+    def build_row(idx: int) -> Dict[str, Any]:
+        a = articles[idx]
+        chosen = chosen_by_article[idx]
+        # Articles without candidates (common on a fresh brand index) skip the page gather.
+        pages = [p for p in map(parsed_pages_get, chosen) if p is not None] if chosen else []
+        row = built_rows[idx] = build_article_row(a, article_candidates[a.style], chosen, pages)
+        return row
+
+    def page_done(u: str) -> None:
+        for idx in waiting_on.pop(u, ()):
+            remaining[idx] -= 1
+            if not remaining[idx]:
+                build_row(idx)
+
+    fetch_set = set(to_fetch)
+    for idx, a in enumerate(articles):
+        cand = article_candidates[a.style]
+        chosen = cand["exact_color"] if cand["exact_color"] else cand["model_hits"]
+        chosen_by_article.append(chosen)
+        for u in dict.fromkeys(chosen):
+            if u in fetch_set:
+                waiting_on[u].append(idx)
+                remaining[idx] += 1
+        if not remaining[idx]:
+            build_row(idx)
+
+    # With --parse-workers, fetch threads hand each page to a parse process and move straight
+    # on to the next URL, so network waits and the (GIL-bound) regex parsing overlap. The
+    # semaphore caps how many fetched-but-unparsed pages are held in memory.
+    parse_pool: Optional[ProcessPoolExecutor] = None
+    parse_slots: Optional[threading.BoundedSemaphore] = None
+    if args.parse_workers > 0:
+        parse_pool = ProcessPoolExecutor(max_workers=args.parse_workers)
+        parse_slots = threading.BoundedSemaphore(2 * args.parse_workers)
+    pending_parses: Dict[str, Future[Dict[str, Any]]] = {}
+
     def fetch_parse(u: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
         try:
             txt = client.get_text(u)
-            page = parse_product_page(u, txt)
-            return u, page, None
+            if parse_pool is None or parse_slots is None:
+                page = parse_product_page(u, txt)
+                return u, page, None
+            parse_slots.acquire()
+            fut = parse_pool.submit(parse_product_page, u, txt)
+            fut.add_done_callback(lambda _: parse_slots.release())  # type: ignore[union-attr]
+            pending_parses[u] = fut
+            return u, None, None
         except Exception as exc:
             return u, None, normalize_space(str(exc))
 
-    urls_sorted = sorted(unique_candidate_urls)
-    if urls_sorted:
-        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as ex:
-            futures = [ex.submit(fetch_parse, u) for u in urls_sorted]
-            for i, fut in enumerate(as_completed(futures), 1):
-                u, page, err = fut.result()
-                if page is not None:
-                    parsed_pages[u] = page
-                else:
-                    fetch_errors[u] = err or "unknown"
-                if i % 25 == 0:
-                    print(f"  parsed {i}/{len(urls_sorted)} pages...", flush=True)
+    fetch_workers = min(MAX_FETCH_WORKERS, max(1, args.fetch_workers or args.workers))
+    fetched = 0
+    try:
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=fetch_workers) as ex, ProgressReporter(
+                lambda: f"  parsed {fetched}/{len(to_fetch)} pages..."
+            ):
+                # Same sliding window as the image downloads: a few queued fetches per worker
+                # instead of one Future per candidate URL for the whole stage.
+                window = fetch_workers * 4
+                in_flight: Set[Future[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]] = set()
+                queue = iter(to_fetch)
+                while True:
+                    for u in islice(queue, window - len(in_flight)):
+                        in_flight.add(ex.submit(fetch_parse, u))
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        fetched += 1
+                        u, page, err = fut.result()
+                        if page is not None:
+                            parsed_pages[u] = page
+                        elif u not in pending_parses:
+                            fetch_errors[u] = err or "unknown"
+                        if u not in pending_parses:
+                            page_done(u)
+        for u, parse_fut in pending_parses.items():
+            try:
+                parsed_pages[u] = parse_fut.result()
+            except Exception as exc:
+                fetch_errors[u] = normalize_space(str(exc))
+            page_done(u)
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+    if to_fetch:
+        # Expired entries would only be refetched, so drop them instead of carrying them forever.
+        pages_cache = {u: e for u, e in pages_cache.items() if now - int(e.get("fetched_at") or 0) <= max_age}
+        for u in to_fetch:
+            page = parsed_pages.get(u)
+            if page is not None:
+                pages_cache[u] = {"fetched_at": now, "page": page}
+        write_json(
+            pages_cache_path,
+            {"version": PARSED_PAGES_VERSION, "generated_at": now, "pages": pages_cache},
+            compact=True,
+        )
 
     print("[5/6] Build full per-article dataset...", flush=True)
     rows: List[Dict[str, Any]] = []
     unmatched: List[Dict[str, Any]] = []
 
-    for a in articles:
-        cand = article_candidates[a.style]
-        chosen = cand["exact_color"] if cand["exact_color"] else cand["model_hits"]
-        pages = [parsed_pages[u] for u in chosen if u in parsed_pages]
-
-        best_match = pages[0] if pages else None
-
-        row: Dict[str, Any] = {
-            "style": a.style,
-            "commercial_style": a.commercial_style,
-            "name": a.name,
-            "invoice_numbers": a.invoice_numbers,
-            "invoice_dates": a.invoice_dates,
-            "ddt_numbers": a.ddt_numbers,
-            "ddt_dates": a.ddt_dates,
-            "season_years": a.season_years,
-            "currency": a.currency,
-            "made_in": a.made_in,
-            "brand": a.brand,
-            "item_descriptions": a.item_descriptions,
-            "composition_fabric": a.composition_fabric,
-            "composition_description": a.composition_description,
-            "composition_details": a.composition_details,
-            "customs_codes": a.customs_codes,
-            "sizes": a.sizes,
-            "var_comm_codes": a.var_comm_codes,
-            "var_descriptions": a.var_descriptions,
-            "eans": a.eans,
-            "total_qty": a.total_qty,
-            "total_net_amount": a.total_net_amount,
-            "unit_cost_prices": a.unit_cost_prices,
-            "unit_weights": a.unit_weights,
-            "site_data": {
-                "site": "online-fashion.ru",
-                "candidate_urls": chosen,
-                "candidate_urls_exact_color": cand["exact_color"],
-                "candidate_urls_model_only": cand["model_hits"],
-                "best_match": best_match,
-                "pages": pages,
-            },
-        }
-
-        row["download"] = {
-            "downloaded": 0,
-            "skipped": 0,
-            "failed": 0,
-            "dir": "",
-        }
-
+    for idx, a in enumerate(articles):
+        # Every fetched URL reports back through page_done; the fallback only guards against a
+        # row that was somehow left waiting.
+        row = built_rows[idx] or build_row(idx)
         rows.append(row)
-        if not pages:
+        if not row["site_data"]["pages"]:
             unmatched.append(
                 {
                     "style": a.style,
@@ -1091,22 +1646,19 @@ def main() -> None:
             )
 
     print("[6/6] Write outputs...", flush=True)
-    json_path.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    flat_rows = flatten_for_csv(rows)
-    if flat_rows:
-        with csv_path.open("w", encoding="utf-8", newline="") as fp:
-            writer = csv.DictWriter(fp, fieldnames=list(flat_rows[0].keys()))
-            writer.writeheader()
-            writer.writerows(flat_rows)
-
-    with unmatched_path.open("w", encoding="utf-8", newline="") as fp:
-        fields = ["style", "commercial_style", "name", "var_comm_codes", "var_descriptions"]
-        writer = csv.DictWriter(fp, fieldnames=fields)
-        writer.writeheader()
-        writer.writerows(unmatched)
+    # The three files are independent; writing them side by side overlaps the disk writes
+    # (which release the GIL) with encoding the others.
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        writes = [
+            # Read back only by --mode download-images, the Bosco extractor and the merge step.
+            ex.submit(write_json, json_path, rows, True),
+            ex.submit(write_cards_csv, csv_path, rows),
+            ex.submit(write_unmatched_csv, unmatched_path, unmatched),
+        ]
+    for write in writes:
+        write.result()
 
-    matched_count = sum(1 for r in rows if r["site_data"].get("pages"))
+    matched_count = len(rows) - len(unmatched)
     total_downloaded = sum(int((r.get("download") or {}).get("downloaded", 0)) for r in rows)
     total_failed = sum(int((r.get("download") or {}).get("failed", 0)) for r in rows)
 
@@ -1116,6 +1668,7 @@ def main() -> None:
         "article_unmatched": len(rows) - matched_count,
         "online_fashion_url_index_count": len(url_index),
         "unique_pages_fetched": len(parsed_pages),
+        "unique_pages_from_cache": pages_from_cache,
         "page_fetch_errors": len(fetch_errors),
         "image_downloaded": total_downloaded,
         "image_failed": total_failed,
@@ -1123,33 +1676,27 @@ def main() -> None:
             "json": str(json_path),
             "csv": str(csv_path),
             "unmatched_csv": str(unmatched_path),
-            "url_index_json": str(out_dir / "online_fashion_url_index.json"),
+            "url_index_json": str(index_cache_path),
+            "pages_cache_json": str(pages_cache_path),
         },
     }
-    (out_dir / "run_summary.json").write_text(
-        json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    write_json(run_summary_path, summary)
 
     print(json.dumps(summary, ensure_ascii=False, indent=2), flush=True)
 
     if args.mode == "all":
         print("[all] Starting image downloads...", flush=True)
-        img_client = HttpClient(
-            timeout=args.timeout,
-            retries=max(1, args.retries),
-            delay=0.0,
-            use_curl_fallback=bool(args.curl_fallback),
-        )
-        res = download_images_from_json(
+        # Images live on the same host as the product pages: reuse the connections stage 4 opened.
+        img_client = client.with_settings(retries=max(1, args.retries), delay=0.0)
+        # The in-memory rows are what was just written to json_path; no need to re-read it.
+        res = download_images_from_rows(
             client=img_client,
-            article_cards_json=json_path,
+            rows=rows,
             out_dir=out_dir,
             workers=max(4, args.workers),
             overwrite=args.overwrite_images,
         )
-        (out_dir / "image_download_summary.json").write_text(
-            json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
+        write_json(img_summary_path, res)
         print(json.dumps(res, ensure_ascii=False, indent=2), flush=True)
 
 
@@ -17,50 +17,121 @@ import argparse
 import csv
 import gzip
 import html
+import io
 import json
 import random
 import re
 import sqlite3
 import sys
+import threading
 import time
 import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from itertools import takewhile
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import IO, Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
 from urllib.error import HTTPError, URLError
-from urllib.parse import urljoin, urlparse
-from urllib.request import HTTPCookieProcessor, Request, build_opener
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.request import Request
+import http.client
 import http.cookiejar
 
 
+_MAX_REDIRECTS = 10
+RETRY_MAX_DELAY = 120.0
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+_STALE_CONN_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
 DEFAULT_UA = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/131.0.0.0 Safari/537.36"
 )
 
+WS_RE = re.compile(r"\s+")
+SCRIPT_BLOCK_RE = re.compile(r"<script[\s\S]*?</script>", re.IGNORECASE)
+STYLE_BLOCK_RE = re.compile(r"<style[\s\S]*?</style>", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^>]+>")
+# href of <a>/<link> tags in any quoting style; <script> blocks match the first branch with
+# empty groups so URLs inside inline JS are skipped.
+LINK_HREF_RE = re.compile(
+    r"""<script\b[\s\S]*?</script\s*>"""
+    r"""|<(?:a|link)\s[^>]*?(?<![\w-])href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'<>`]+))""",
+    re.IGNORECASE,
+)
+PLAIN_URL_RE = re.compile(r"https?://([A-Za-z0-9.:@_-]+)(?:/[^?#\[\]\s]*)?")
+CHARSET_RE = re.compile(r"charset=([a-zA-Z0-9._-]+)")
+H1_RE = re.compile(r"<h1[^>]*>([\s\S]*?)</h1>", re.IGNORECASE)
+RU_STALE_CATALOG_RE = re.compile(r"^https://twinset\.ru/catalog/\d+/?$", re.IGNORECASE)
+RU_SKU_TEXT_RE = re.compile(r"Код\s*товара\s*:\s*([A-Z0-9]+)", re.IGNORECASE)
+COM_SKU_URL_RE = re.compile(r"-([0-9]{3}[A-Z]{2,5}[0-9A-Z]{2,})(?:_[0-9A-Z]+)?\.html$", re.IGNORECASE)
+COM_SKU_TEXT_RE = re.compile(r'Product code:\s*<span class="value">([^<]+)</span>', re.IGNORECASE)
+COM_BREADCRUMB_RE = re.compile(r'<li[^>]*class="[^"]*breadcrumb-item[^"]*"[^>]*>([\s\S]*?)</li>', re.IGNORECASE)
+JSON_DECODER = json.JSONDecoder()
+# detect_block_page: "cf-challenge" alone is enough, otherwise two of these must appear.
+BLOCK_PAGE_MARKERS = (
+    "attention required!",
+    "verify you are a human",
+    "captcha",
+    "access denied",
+    "temporarily unavailable",
+)
+PENDING_URL_WINDOW = 100
+CRAWL_URL_TYPES = ("product", "category")
+ENQUEUABLE_URL_TYPES = frozenset(CRAWL_URL_TYPES)
+SITEMAP_SUFFIXES = (".xml", ".xml.gz")
+SKIP_HREF_PREFIXES = ("#", "javascript:", "mailto:", "tel:")
+
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
 def normalize_space(value: str) -> str:
-    return re.sub(r"\s+", " ", value).strip()
+    return WS_RE.sub(" ", value).strip()
+
+
+def clean_text(value: Any, upper: bool = False) -> Optional[str]:
+    """normalize_space(str(value)), optionally upper-cased; None for empty/missing values."""
+    if not value:
+        return None
+    text = normalize_space(str(value))
+    if not text:
+        return None
+    return text.upper() if upper else text
 
 
 def strip_tags(value: str) -> str:
-    value = re.sub(r"<script[\s\S]*?</script>", " ", value, flags=re.IGNORECASE)
-    value = re.sub(r"<style[\s\S]*?</style>", " ", value, flags=re.IGNORECASE)
-    value = re.sub(r"<[^>]+>", " ", value)
+    value = SCRIPT_BLOCK_RE.sub(" ", value)
+    value = STYLE_BLOCK_RE.sub(" ", value)
+    value = TAG_RE.sub(" ", value)
     return normalize_space(html.unescape(value))
 
 
+def strip_simple_tags(value: str) -> str:
+    """strip_tags for short fragments; skips the script/style passes when there is no "<s" to match."""
+    if "<s" in value or "<S" in value:
+        return strip_tags(value)
+    return normalize_space(html.unescape(TAG_RE.sub(" ", value)))
+
+
+@lru_cache(maxsize=65536)
 def strip_query_and_fragment(url: str) -> str:
-    parsed = urlparse(url)
-    clean = parsed._replace(query="", fragment="")
-    normalized = clean.geturl()
-    if normalized.endswith("/") and parsed.netloc.endswith("twinset.com") and normalized.count("/") > 3:
+    plain = PLAIN_URL_RE.fullmatch(url)
+    if plain:
+        # Nothing to strip and nothing urlsplit would normalize.
+        if url.endswith("/") and plain.group(1).endswith("twinset.com") and url.count("/") > 3:
+            return url[:-1]
+        return url
+
+    parts = urlsplit(url)
+    normalized = urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+    if normalized.endswith("/") and parts.netloc.endswith("twinset.com") and normalized.count("/") > 3:
         normalized = normalized[:-1]
     return normalized
 
@@ -85,26 +156,25 @@ def safe_exc(exc: Exception) -> str:
 
 def detect_block_page(page_html: str) -> bool:
     lowered = page_html.lower()
-    markers = [
-        "attention required!",
-        "cf-challenge",
-        "verify you are a human",
-        "captcha",
-        "access denied",
-        "temporarily unavailable",
-    ]
-    score = sum(1 for marker in markers if marker in lowered)
-    return score >= 2 or "cf-challenge" in lowered
-
-
-def extract_first(pattern: str, text: str, flags: int = 0) -> Optional[str]:
-    match = re.search(pattern, text, flags)
+    if "cf-challenge" in lowered:
+        return True
+    score = 0
+    for marker in BLOCK_PAGE_MARKERS:
+        if marker in lowered:
+            score += 1
+            if score >= 2:
+                return True
+    return False
+
+
+def extract_first(pattern: re.Pattern[str], text: str) -> Optional[str]:
+    match = pattern.search(text)
     if not match:
         return None
     return match.group(1)
 
 
-def extract_js_value(page_html: str, marker: str) -> Optional[str]:
+def extract_js_value(page_html: str, marker: str) -> Any:
     start_marker = page_html.find(marker)
     if start_marker < 0:
         return None
@@ -114,59 +184,28 @@ def extract_js_value(page_html: str, marker: str) -> Optional[str]:
     while idx < length and page_html[idx].isspace():
         idx += 1
 
-    if idx >= length:
+    if idx >= length or page_html[idx] not in "{[":
         return None
 
-    open_ch = page_html[idx]
-    close_ch = {"{": "}", "[": "]"}.get(open_ch)
-    if not close_ch:
+    try:
+        value, _ = JSON_DECODER.raw_decode(page_html, idx)
+    except json.JSONDecodeError:
         return None
-
-    depth = 0
-    in_string = False
-    escaped = False
-    quote_char = ""
-
-    for pos in range(idx, length):
-        ch = page_html[pos]
-
-        if in_string:
-            if escaped:
-                escaped = False
-                continue
-            if ch == "\\":
-                escaped = True
-                continue
-            if ch == quote_char:
-                in_string = False
-                quote_char = ""
-            continue
-
-        if ch == "'" or ch == '"':
-            in_string = True
-            quote_char = ch
-            continue
-
-        if ch == open_ch:
-            depth += 1
-            continue
-
-        if ch == close_ch:
-            depth -= 1
-            if depth == 0:
-                return page_html[idx : pos + 1]
-
-    return None
+    return value
 
 
 def extract_links(page_html: str, page_url: str) -> List[str]:
-    hrefs = re.findall(r'href="([^"]+)"', page_html, flags=re.IGNORECASE)
     out: List[str] = []
-    for href in hrefs:
+    seen_hrefs = set()
+    for quoted, single_quoted, bare in LINK_HREF_RE.findall(page_html):
+        href = quoted or single_quoted or bare
+        if href in seen_hrefs:
+            continue
+        seen_hrefs.add(href)
         href = href.strip()
         if not href:
             continue
-        if href.startswith("#") or href.startswith("javascript:") or href.startswith("mailto:") or href.startswith("tel:"):
+        if href.startswith(SKIP_HREF_PREFIXES):
             continue
         abs_url = urljoin(page_url, html.unescape(href))
         out.append(strip_query_and_fragment(abs_url))
@@ -224,14 +263,22 @@ class LogWriter:
         self.path = path
         self.verbose = verbose
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One line-buffered handle for the whole run instead of an open/close per line; each
+        # line still reaches the file as soon as it is written (tail -f, interrupted crawls).
+        self._fp = self.path.open("a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
 
     def write(self, level: str, message: str) -> None:
         line = f"{now_iso()} [{level}] {message}"
-        with self.path.open("a", encoding="utf-8") as fp:
-            fp.write(line + "\n")
+        with self._lock:
+            self._fp.write(line + "\n")
         if self.verbose:
             print(line, flush=True)
 
+    def close(self) -> None:
+        with self._lock:
+            self._fp.close()
+
     def info(self, message: str) -> None:
         self.write("INFO", message)
 
@@ -242,6 +289,48 @@ class LogWriter:
         self.write("ERROR", message)
 
 
+def retry_delay(attempt: int, exc: HTTPError) -> float:
+    """
+    Backoff before retrying an HTTP error: the server's Retry-After (seconds or HTTP date) for
+    429/503, else exponential with jitter for those two, else the old linear 1.2s * attempt.
+    """
+    if exc.code not in (429, 503):
+        return 1.2 * attempt
+    retry_after = ((exc.headers.get("Retry-After") if exc.headers is not None else None) or "").strip()
+    if retry_after.isdigit():
+        return min(RETRY_MAX_DELAY, float(retry_after))
+    if retry_after:
+        try:
+            when = parsedate_to_datetime(retry_after)
+            return min(RETRY_MAX_DELAY, max(0.0, (when - datetime.now(timezone.utc)).total_seconds()))
+        except (TypeError, ValueError):
+            pass
+    return min(RETRY_MAX_DELAY, 2**attempt + random.random())
+
+
+class RequestPacer:
+    """
+    Spaces the starts of requests to one host by a random interval in [delay_min, delay_max],
+    shared by all fetch threads: concurrency caps requests in flight, the pacer caps the rate.
+    """
+
+    def __init__(self, delay_min: float, delay_max: float) -> None:
+        self.delay_min = delay_min
+        self.delay_max = delay_max
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if self.delay_max <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + random.uniform(self.delay_min, self.delay_max)
+        if start > now:
+            time.sleep(start - now)
+
+
 class SimpleHttpClient:
     def __init__(
         self,
@@ -264,8 +353,73 @@ class SimpleHttpClient:
                 cookie_jar = mozilla_jar
             except Exception:
                 pass
+        self.cookie_jar = cookie_jar
+
+        # Idle keep-alive connections per (scheme, host), shared by all fetch threads, so a
+        # crawl pays for one TCP/TLS handshake per host instead of one per page.
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._idle_lock = threading.Lock()
+
+    def _acquire(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        with self._idle_lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    def _release(self, scheme: str, netloc: str, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        """Return conn to the idle pool once resp has been read to the end."""
+        if resp.will_close:
+            conn.close()
+            return
+        with self._idle_lock:
+            self._idle.setdefault((scheme, netloc), []).append(conn)
 
-        self.opener = build_opener(HTTPCookieProcessor(cookie_jar))
+    def close(self) -> None:
+        """Close the idle keep-alive connections."""
+        with self._idle_lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _fetch_once(self, url: str, headers: Dict[str, str]) -> Tuple[bytes, Dict[str, str]]:
+        for _ in range(_MAX_REDIRECTS + 1):
+            # A urllib Request is only used to let the cookie jar add and collect cookies.
+            req = Request(url, headers=headers)
+            self.cookie_jar.add_cookie_header(req)
+            parts = urlsplit(url)
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn = self._acquire(parts.scheme, parts.netloc)
+            reused = conn.sock is not None
+            try:
+                try:
+                    conn.request("GET", path, headers=dict(req.header_items()))
+                    resp = conn.getresponse()
+                except _STALE_CONN_ERRORS:
+                    # The server dropped an idle keep-alive connection; retry once on a fresh one.
+                    if not reused:
+                        raise
+                    conn.close()
+                    conn.request("GET", path, headers=dict(req.header_items()))
+                    resp = conn.getresponse()
+                raw = resp.read()
+            except BaseException:
+                conn.close()
+                raise
+            self._release(parts.scheme, parts.netloc, conn, resp)
+            self.cookie_jar.extract_cookies(resp, req)  # type: ignore[arg-type]
+
+            location = resp.getheader("Location")
+            if resp.status in _REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                continue
+            if resp.status >= 400:
+                raise HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            return raw, {k.lower(): v for k, v in resp.headers.items()}
+        # Same outcome as urllib's redirect handler: the last redirect status as an HTTPError.
+        raise HTTPError(url, resp.status, "too many redirects", resp.headers, None)
 
     def get_bytes(self, url: str) -> Tuple[bytes, Dict[str, str]]:
         headers = {
@@ -280,19 +434,15 @@ class SimpleHttpClient:
 
         last_error: Optional[Exception] = None
         for attempt in range(1, self.retries + 1):
-            req = Request(url, headers=headers)
             try:
-                with self.opener.open(req, timeout=self.timeout) as resp:
-                    raw = resp.read()
-                    resp_headers = {k.lower(): v for k, v in resp.headers.items()}
-                    return raw, resp_headers
+                return self._fetch_once(url, headers)
             except HTTPError as exc:
-                # Preserve HTTP status for caller (404/429/403 handling).
-                if attempt >= self.retries:
+                # Preserve HTTP status for caller (404/429/403 handling). Gone pages are final.
+                if attempt >= self.retries or exc.code in (404, 410):
                     raise
                 last_error = exc
-                time.sleep(1.2 * attempt)
-            except (URLError, TimeoutError, ConnectionError) as exc:
+                time.sleep(retry_delay(attempt, exc))
+            except (URLError, OSError, http.client.HTTPException) as exc:
                 last_error = exc
                 if attempt >= self.retries:
                     break
@@ -303,19 +453,59 @@ class SimpleHttpClient:
         raw, headers = self.get_bytes(url)
         charset = "utf-8"
         ctype = headers.get("content-type", "")
-        m = re.search(r"charset=([a-zA-Z0-9._-]+)", ctype)
+        m = CHARSET_RE.search(ctype)
         if m:
             charset = m.group(1).strip()
         return raw.decode(charset, errors="ignore"), headers
 
 
+_SQL_UPSERT_PRODUCT = """
+    INSERT INTO products(site, url, sku, title, category_path, payload_json, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(site, url) DO UPDATE SET
+        sku = excluded.sku,
+        title = excluded.title,
+        category_path = excluded.category_path,
+        payload_json = excluded.payload_json,
+        updated_at = excluded.updated_at
+"""
+
+_SQL_UPSERT_SKU = """
+    INSERT INTO sku_index(site, sku, url, title, category_path, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(site, sku, url) DO UPDATE SET
+        title = excluded.title,
+        category_path = excluded.category_path,
+        updated_at = excluded.updated_at
+"""
+
+# Same output as json.dumps(payload, ensure_ascii=False) without building an encoder per call.
+_encode_payload_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
 class IndexDb:
-    def __init__(self, db_path: Path) -> None:
+    # commit_batch() commits after this many calls or this many seconds, whichever comes first.
+    BATCH_SIZE = 500
+    BATCH_SECONDS = 5.0
+
+    def __init__(self, db_path: Path, batch_size: Optional[int] = None) -> None:
         db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size or self.BATCH_SIZE
         self.conn = sqlite3.connect(str(db_path))
         self.conn.execute("PRAGMA journal_mode=WAL;")
         self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute("PRAGMA cache_size=-65536;")  # 64 MiB page cache
+        self.conn.execute("PRAGMA temp_store=MEMORY;")
+        self.conn.execute("PRAGMA mmap_size=268435456;")
+        self.conn.execute("PRAGMA wal_autocheckpoint=10000;")
+        self.conn.execute("PRAGMA busy_timeout=5000;")
         self.conn.row_factory = sqlite3.Row
+        self._batch_ops = 0
+        self._batch_started = time.monotonic()
+        # URLs this process has already enqueued (inserted or found present), per site. Every
+        # page links the same nav/category URLs, so most enqueues are repeats; skipping them here
+        # saves the INSERT ... ON CONFLICT DO NOTHING, which would not change anything.
+        self._known_urls: Dict[str, set] = {}
         self._init_schema()
 
     def _init_schema(self) -> None:
@@ -368,21 +558,37 @@ class IndexDb:
                 updated_at TEXT NOT NULL,
                 PRIMARY KEY (site, sku, url)
             );
+
+            -- Cover the filters and ORDER BY of next_pending_sitemap / next_pending_url
+            -- and the per-article lookup in match_articles.
+            CREATE INDEX IF NOT EXISTS idx_sitemap_pending ON sitemaps(site, status, attempts, updated_at);
+            CREATE INDEX IF NOT EXISTS idx_queue_pending ON url_queue(site, status, depth, attempts, updated_at);
+            CREATE INDEX IF NOT EXISTS idx_sku_lookup ON sku_index(sku, updated_at);
             """
         )
         self.conn.commit()
 
+    def analyze(self) -> None:
+        """Refresh planner statistics once the queue tables have real data in them."""
+        self.conn.execute("ANALYZE;")
+        self.conn.commit()
+
     def close(self) -> None:
         self.conn.close()
 
     def enqueue_sitemap(self, site: str, url: str, discovered_from: Optional[str]) -> None:
-        self.conn.execute(
+        self.enqueue_sitemaps_bulk(site, [(url, discovered_from)])
+
+    def enqueue_sitemaps_bulk(self, site: str, rows: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """Enqueue (url, discovered_from) pairs with one executemany; earlier duplicates win."""
+        now = now_iso()
+        self.conn.executemany(
             """
             INSERT INTO sitemaps(site, url, status, discovered_from, updated_at)
             VALUES (?, ?, 'pending', ?, ?)
             ON CONFLICT(site, url) DO NOTHING
             """,
-            (site, url, discovered_from, now_iso()),
+            [(site, url, discovered_from, now) for url, discovered_from in rows],
         )
 
     def set_sitemap_status(
@@ -407,19 +613,21 @@ class IndexDb:
         )
 
     def next_pending_sitemap(self, site: str) -> Optional[str]:
-        row = self.conn.execute(
+        urls = self.next_pending_sitemaps(site, limit=1)
+        return urls[0] if urls else None
+
+    def next_pending_sitemaps(self, site: str, limit: int) -> List[str]:
+        rows = self.conn.execute(
             """
             SELECT url
             FROM sitemaps
             WHERE site = ? AND status = 'pending'
             ORDER BY attempts ASC, updated_at ASC
-            LIMIT 1
+            LIMIT ?
             """,
-            (site,),
-        ).fetchone()
-        if not row:
-            return None
-        return str(row["url"])
+            (site, limit),
+        ).fetchall()
+        return [str(row["url"]) for row in rows]
 
     def enqueue_url(
         self,
@@ -429,19 +637,47 @@ class IndexDb:
         depth: int,
         discovered_from: Optional[str],
     ) -> None:
-        self.conn.execute(
+        self.enqueue_urls_bulk(site, [(url, url_type, depth, discovered_from)])
+
+    def enqueue_urls_bulk(self, site: str, rows: Iterable[Tuple[str, str, int, Optional[str]]]) -> None:
+        """Enqueue (url, url_type, depth, discovered_from) rows with one executemany; earlier duplicates win."""
+        known = self._known_urls.setdefault(site, set())
+        batch_urls = set()
+        fresh: List[Tuple[str, str, str, int, Optional[str], str]] = []
+        now = now_iso()
+        for url, url_type, depth, discovered_from in rows:
+            if url in known or url in batch_urls:
+                continue
+            batch_urls.add(url)
+            fresh.append((site, url, url_type, depth, discovered_from, now))
+        if not fresh:
+            return
+        self.conn.executemany(
             """
             INSERT INTO url_queue(site, url, url_type, status, depth, discovered_from, updated_at)
             VALUES (?, ?, ?, 'pending', ?, ?, ?)
             ON CONFLICT(site, url) DO NOTHING
             """,
-            (site, url, url_type, depth, discovered_from, now_iso()),
+            fresh,
         )
+        # Only once the insert went through: a failed one (e.g. "database is locked") must not
+        # mark these URLs as enqueued for the rest of the run.
+        known.update(batch_urls)
 
     def next_pending_url(self, site: str, allowed_types: Sequence[str], max_depth: int) -> Optional[sqlite3.Row]:
+        rows = self.next_pending_urls(site, allowed_types, max_depth, limit=1)
+        return rows[0] if rows else None
+
+    def next_pending_urls(
+        self,
+        site: str,
+        allowed_types: Sequence[str],
+        max_depth: int,
+        limit: int,
+    ) -> List[sqlite3.Row]:
         placeholders = ",".join("?" for _ in allowed_types)
-        params: List[Any] = [site, *allowed_types, max_depth]
-        row = self.conn.execute(
+        params: List[Any] = [site, *allowed_types, max_depth, limit]
+        rows = self.conn.execute(
             f"""
             SELECT *
             FROM url_queue
@@ -450,11 +686,11 @@ class IndexDb:
               AND url_type IN ({placeholders})
               AND depth <= ?
             ORDER BY depth ASC, attempts ASC, updated_at ASC
-            LIMIT 1
+            LIMIT ?
             """,
             params,
-        ).fetchone()
-        return row
+        ).fetchall()
+        return rows
 
     def set_url_status(
         self,
@@ -487,33 +723,15 @@ class IndexDb:
         title: Optional[str],
         category_path: Optional[str],
         payload: Dict[str, Any],
+        now: Optional[str] = None,
     ) -> None:
-        payload_json = json.dumps(payload, ensure_ascii=False)
+        now = now or now_iso()
         self.conn.execute(
-            """
-            INSERT INTO products(site, url, sku, title, category_path, payload_json, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(site, url) DO UPDATE SET
-                sku = excluded.sku,
-                title = excluded.title,
-                category_path = excluded.category_path,
-                payload_json = excluded.payload_json,
-                updated_at = excluded.updated_at
-            """,
-            (site, url, sku, title, category_path, payload_json, now_iso()),
+            _SQL_UPSERT_PRODUCT,
+            (site, url, sku, title, category_path, _encode_payload_json(payload), now),
         )
         if sku:
-            self.conn.execute(
-                """
-                INSERT INTO sku_index(site, sku, url, title, category_path, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(site, sku, url) DO UPDATE SET
-                    title = excluded.title,
-                    category_path = excluded.category_path,
-                    updated_at = excluded.updated_at
-                """,
-                (site, sku, url, title, category_path, now_iso()),
-            )
+            self.conn.execute(_SQL_UPSERT_SKU, (site, sku, url, title, category_path, now))
 
     def reset_errors(self, site: str) -> int:
         cur = self.conn.execute(
@@ -553,23 +771,24 @@ class IndexDb:
         sku_csv = export_dir / "sku_index.csv"
         errors_csv = export_dir / "url_errors.csv"
 
+        # Rows are streamed straight from the cursor; the SELECT column order is the CSV header order.
         with sku_csv.open("w", encoding="utf-8", newline="") as fp:
-            writer = csv.DictWriter(fp, fieldnames=["site", "sku", "url", "title", "category_path", "updated_at"])
-            writer.writeheader()
-            rows = self.conn.execute(
-                """
-                SELECT site, sku, url, title, category_path, updated_at
-                FROM sku_index
-                ORDER BY site, sku, updated_at DESC
-                """
-            ).fetchall()
-            for row in rows:
-                writer.writerow(dict(row))
+            writer = csv.writer(fp)
+            writer.writerow(["site", "sku", "url", "title", "category_path", "updated_at"])
+            writer.writerows(
+                self.conn.execute(
+                    """
+                    SELECT site, sku, url, title, category_path, updated_at
+                    FROM sku_index
+                    ORDER BY site, sku, updated_at DESC
+                    """
+                )
+            )
 
         with errors_csv.open("w", encoding="utf-8", newline="") as fp:
-            writer = csv.DictWriter(
-                fp,
-                fieldnames=[
+            writer = csv.writer(fp)
+            writer.writerow(
+                [
                     "site",
                     "url",
                     "url_type",
@@ -579,19 +798,18 @@ class IndexDb:
                     "last_http_status",
                     "last_error",
                     "updated_at",
-                ],
+                ]
+            )
+            writer.writerows(
+                self.conn.execute(
+                    """
+                    SELECT site, url, url_type, status, attempts, blocked, last_http_status, last_error, updated_at
+                    FROM url_queue
+                    WHERE status IN ('error', 'blocked')
+                    ORDER BY updated_at DESC
+                    """
+                )
             )
-            writer.writeheader()
-            rows = self.conn.execute(
-                """
-                SELECT site, url, url_type, status, attempts, blocked, last_http_status, last_error, updated_at
-                FROM url_queue
-                WHERE status IN ('error', 'blocked')
-                ORDER BY updated_at DESC
-                """
-            ).fetchall()
-            for row in rows:
-                writer.writerow(dict(row))
 
         return {"sku_index_csv": str(sku_csv), "errors_csv": str(errors_csv)}
 
@@ -604,45 +822,41 @@ class IndexDb:
         cleaned = [normalize_space(a).upper() for a in articles if normalize_space(a)]
         cleaned = dedupe_keep_order(cleaned)
 
-        found_rows: List[Dict[str, Any]] = []
-        missing_rows: List[Dict[str, Any]] = []
+        found_rows: List[sqlite3.Row] = []
+        missing_rows: List[Tuple[str]] = []
 
-        for article in cleaned:
+        # One LEFT JOIN against a temp table instead of a SELECT per article; pos keeps input order.
+        self.conn.execute("DROP TABLE IF EXISTS temp.match_wanted")
+        self.conn.execute("CREATE TEMP TABLE match_wanted(pos INTEGER PRIMARY KEY, sku TEXT NOT NULL)")
+        try:
+            self.conn.executemany("INSERT INTO match_wanted(pos, sku) VALUES (?, ?)", enumerate(cleaned))
             rows = self.conn.execute(
                 """
-                SELECT site, sku, url, title, category_path, updated_at
-                FROM sku_index
-                WHERE sku = ?
-                ORDER BY updated_at DESC
-                """,
-                (article,),
+                SELECT w.sku AS article, s.site, s.url, s.title, s.category_path, s.updated_at
+                FROM match_wanted w
+                LEFT JOIN sku_index s ON s.sku = w.sku
+                ORDER BY w.pos ASC, s.updated_at DESC
+                """
             ).fetchall()
-            if not rows:
-                missing_rows.append({"article": article})
-                continue
-            for row in rows:
-                found_rows.append(
-                    {
-                        "article": article,
-                        "site": row["site"],
-                        "url": row["url"],
-                        "title": row["title"],
-                        "category_path": row["category_path"],
-                        "updated_at": row["updated_at"],
-                    }
-                )
+        finally:
+            self.conn.execute("DROP TABLE IF EXISTS temp.match_wanted")
+            self.conn.commit()
+
+        # Joined rows are already in articles_found.csv column order and are written as-is.
+        for row in rows:
+            if row["site"] is None:
+                missing_rows.append((row["article"],))
+            else:
+                found_rows.append(row)
 
         with found_path.open("w", encoding="utf-8", newline="") as fp:
-            writer = csv.DictWriter(
-                fp,
-                fieldnames=["article", "site", "url", "title", "category_path", "updated_at"],
-            )
-            writer.writeheader()
+            writer = csv.writer(fp)
+            writer.writerow(["article", "site", "url", "title", "category_path", "updated_at"])
             writer.writerows(found_rows)
 
         with missing_path.open("w", encoding="utf-8", newline="") as fp:
-            writer = csv.DictWriter(fp, fieldnames=["article"])
-            writer.writeheader()
+            writer = csv.writer(fp)
+            writer.writerow(["article"])
             writer.writerows(missing_rows)
 
         summary = {
@@ -662,6 +876,17 @@ class IndexDb:
 
     def commit(self) -> None:
         self.conn.commit()
+        self._batch_ops = 0
+        self._batch_started = time.monotonic()
+
+    def commit_batch(self) -> None:
+        """
+        Count one unit of work and commit only every batch_size units or BATCH_SECONDS, so a
+        crawl does not flush the WAL after every page. Callers still commit() when a loop ends.
+        """
+        self._batch_ops += 1
+        if self._batch_ops >= self.batch_size or time.monotonic() - self._batch_started >= self.BATCH_SECONDS:
+            self.commit()
 
 
 def parse_robots_for_sitemaps(robots_text: str) -> List[str]:
@@ -677,32 +902,34 @@ def parse_robots_for_sitemaps(robots_text: str) -> List[str]:
 
 
 def parse_sitemap_locs(raw_bytes: bytes, source_url: str) -> List[str]:
-    payload = raw_bytes
-    if source_url.lower().endswith(".gz"):
-        payload = gzip.decompress(payload)
-    else:
-        try:
-            if payload[:2] == b"\x1f\x8b":
-                payload = gzip.decompress(payload)
-        except Exception:
-            pass
-
-    root = ET.fromstring(payload)
+    # Go by the gzip magic rather than the ".gz" suffix: servers often hand back .xml.gz
+    # already decoded. Compressed payloads are inflated as they are parsed, not up front.
+    stream: IO[bytes] = io.BytesIO(raw_bytes)
+    if raw_bytes[:2] == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+
+    # Stream the document and clear each element once closed so a large sitemap
+    # never holds its whole tree in memory.
     locs: List[str] = []
-    for elem in root.iter():
-        tag = elem.tag.rsplit("}", 1)[-1]
-        if tag != "loc":
-            continue
-        if elem.text:
+    for _, elem in ET.iterparse(stream, events=("end",)):
+        if elem.tag.rpartition("}")[2] == "loc" and elem.text:
             locs.append(normalize_space(elem.text))
+        elem.clear()
     return dedupe_keep_order(locs)
 
 
 def classify_url(site_cfg: SiteConfig, url: str) -> str:
+    # Nav/footer links repeat on every crawled page, so the same URLs are classified over and over.
+    return _classify_url_cached(site_cfg.key, url)
+
+
+@lru_cache(maxsize=65536)
+def _classify_url_cached(site_key: str, url: str) -> str:
+    site_cfg = SITE_CONFIGS[site_key]
     clean = strip_query_and_fragment(url)
     if site_cfg.key == "twinset.ru":
         # Common stale sitemap pattern on bitrix sites; these are often gone (404).
-        if re.match(r"^https://twinset\.ru/catalog/\d+/?$", clean, flags=re.IGNORECASE):
+        if RU_STALE_CATALOG_RE.match(clean):
             return "other"
     if site_cfg.product_url_re.match(clean):
         if site_cfg.key == "twinset.com":
@@ -716,25 +943,20 @@ def classify_url(site_cfg: SiteConfig, url: str) -> str:
 
 
 def extract_twinset_com_sku_from_url(url: str) -> Optional[str]:
-    m = re.search(
-        r"-([0-9]{3}[A-Z]{2,5}[0-9A-Z]{2,})(?:_[0-9A-Z]+)?\.html$",
-        url,
-        flags=re.IGNORECASE,
-    )
+    m = COM_SKU_URL_RE.search(url)
     if not m:
         return None
     return m.group(1).upper()
 
 
 def parse_twinset_ru_product(page_html: str, page_url: str) -> Dict[str, Optional[str]]:
-    raw = extract_js_value(page_html, "window.vueProduct =")
+    parsed = extract_js_value(page_html, "window.vueProduct =")
     sku = None
     title = None
     category_path = None
 
-    if raw:
+    if parsed is not None:
         try:
-            parsed = json.loads(raw)
             root = parsed[0] if isinstance(parsed, list) and parsed and isinstance(parsed[0], dict) else parsed
             if isinstance(root, dict):
                 colors = root.get("colors") if isinstance(root.get("colors"), list) else []
@@ -774,12 +996,12 @@ def parse_twinset_ru_product(page_html: str, page_url: str) -> Dict[str, Optiona
             pass
 
     if not sku:
-        m = extract_first(r"Код\s*товара\s*:\s*([A-Z0-9]+)", page_html, flags=re.IGNORECASE)
+        m = extract_first(RU_SKU_TEXT_RE, page_html)
         if m:
             sku = normalize_space(m).upper()
 
     if not title:
-        h1 = extract_first(r"<h1[^>]*>([\s\S]*?)</h1>", page_html, flags=re.IGNORECASE)
+        h1 = extract_first(H1_RE, page_html)
         title = normalize_space(strip_tags(h1 or "")) or None
 
     return {"sku": sku, "title": title, "category_path": category_path, "url": page_url}
@@ -790,25 +1012,17 @@ def parse_twinset_com_product(page_html: str, page_url: str) -> Dict[str, Option
     title = None
     category_path = None
 
-    h1 = extract_first(r"<h1[^>]*>([\s\S]*?)</h1>", page_html, flags=re.IGNORECASE)
+    h1 = extract_first(H1_RE, page_html)
     if h1:
         title = normalize_space(strip_tags(h1))
 
     if not sku:
-        m = extract_first(
-            r'Product code:\s*<span class="value">([^<]+)</span>',
-            page_html,
-            flags=re.IGNORECASE,
-        )
+        m = extract_first(COM_SKU_TEXT_RE, page_html)
         if m:
             sku = normalize_space(m).upper()
 
-    crumbs = re.findall(
-        r'<li[^>]*class="[^"]*breadcrumb-item[^"]*"[^>]*>([\s\S]*?)</li>',
-        page_html,
-        flags=re.IGNORECASE,
-    )
-    crumb_texts = [normalize_space(strip_tags(item)) for item in crumbs]
+    crumbs = COM_BREADCRUMB_RE.findall(page_html)
+    crumb_texts = [strip_simple_tags(item) for item in crumbs]
     crumb_texts = [item for item in crumb_texts if item]
     if crumb_texts:
         category_path = " > ".join(crumb_texts)
@@ -863,6 +1077,49 @@ def load_articles_from_xlsx(xlsx_path: Path, sheet: Optional[str], part_column:
     return dedupe_keep_order(out)
 
 
+def crawl_sitemap(
+    db: IndexDb,
+    site_cfg: SiteConfig,
+    logger: LogWriter,
+    next_url: str,
+    fetch: Callable[[], Tuple[bytes, Dict[str, str]]],
+) -> None:
+    """Fetch one queued sitemap via fetch() and enqueue its nested sitemaps and product/category URLs."""
+    site_key = site_cfg.key
+    try:
+        raw, _headers = fetch()
+        locs = parse_sitemap_locs(raw, next_url)
+        item_count = len(locs)
+        # Collected per sitemap and written with one executemany per table.
+        nested_rows: List[Tuple[str, Optional[str]]] = []
+        leaf_rows: List[Tuple[str, str, int, Optional[str]]] = []
+
+        for loc in locs:
+            clean = strip_query_and_fragment(loc)
+            if clean.lower().endswith(SITEMAP_SUFFIXES):
+                nested_rows.append((clean, next_url))
+                continue
+
+            url_type = _classify_url_cached(site_key, clean)
+            if url_type in ENQUEUABLE_URL_TYPES:
+                leaf_rows.append((clean, url_type, 0, next_url))
+
+        db.enqueue_sitemaps_bulk(site_key, nested_rows)
+        db.enqueue_urls_bulk(site_key, leaf_rows)
+        nested = len(nested_rows)
+        leaf = len(leaf_rows)
+
+        db.set_sitemap_status(site_key, next_url, "done", item_count=item_count, error=None)
+        db.commit_batch()
+        logger.info(
+            f"{site_key} sitemap done: {next_url} (locs={item_count}, nested={nested}, queued={leaf})"
+        )
+    except Exception as exc:
+        db.set_sitemap_status(site_key, next_url, "error", item_count=None, error=safe_exc(exc))
+        db.commit_batch()
+        logger.warn(f"{site_key} sitemap error: {next_url} :: {safe_exc(exc)}")
+
+
 def crawl_sitemaps(
     db: IndexDb,
     client: SimpleHttpClient,
@@ -871,62 +1128,145 @@ def crawl_sitemaps(
     delay_min: float,
     delay_max: float,
     max_sitemaps: Optional[int],
+    concurrency: int = 1,
 ) -> int:
+    candidate_rows: List[Tuple[str, Optional[str]]] = []
     for candidate in site_cfg.sitemap_candidates:
         if candidate.endswith("robots.txt"):
             try:
                 text, _ = client.get_text(candidate)
-                for sitemap_url in parse_robots_for_sitemaps(text):
-                    db.enqueue_sitemap(site_cfg.key, strip_query_and_fragment(sitemap_url), candidate)
+                candidate_rows.extend(
+                    (strip_query_and_fragment(sitemap_url), candidate) for sitemap_url in parse_robots_for_sitemaps(text)
+                )
             except Exception as exc:
                 logger.warn(f"{site_cfg.key} robots read failed: {safe_exc(exc)}")
         else:
-            db.enqueue_sitemap(site_cfg.key, strip_query_and_fragment(candidate), None)
+            candidate_rows.append((strip_query_and_fragment(candidate), None))
+    db.enqueue_sitemaps_bulk(site_cfg.key, candidate_rows)
     db.commit()
 
     processed = 0
-    while True:
-        if max_sitemaps is not None and processed >= max_sitemaps:
-            break
+    # With concurrency > 1 up to that many pending sitemaps are fetched at once, paced so the host
+    # sees on average `concurrency` requests per delay window; they are parsed and stored in
+    # queue order on this thread.
+    pool = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+    pacer = RequestPacer(delay_min / max(1, concurrency), delay_max / max(1, concurrency))
 
-        next_url = db.next_pending_sitemap(site_cfg.key)
-        if not next_url:
-            break
+    def paced_get_bytes(url: str) -> Tuple[bytes, Dict[str, str]]:
+        pacer.wait()
+        return client.get_bytes(url)
 
-        try:
-            raw, _headers = client.get_bytes(next_url)
-            locs = parse_sitemap_locs(raw, next_url)
-            item_count = len(locs)
-            nested = 0
-            leaf = 0
-
-            for loc in locs:
-                clean = strip_query_and_fragment(loc)
-                if clean.lower().endswith(".xml") or clean.lower().endswith(".xml.gz"):
-                    db.enqueue_sitemap(site_cfg.key, clean, next_url)
-                    nested += 1
-                    continue
+    try:
+        while True:
+            limit = max(1, concurrency)
+            if max_sitemaps is not None:
+                if processed >= max_sitemaps:
+                    break
+                limit = min(limit, max_sitemaps - processed)
 
-                url_type = classify_url(site_cfg, clean)
-                if url_type in {"product", "category"}:
-                    db.enqueue_url(site_cfg.key, clean, url_type, depth=0, discovered_from=next_url)
-                    leaf += 1
+            batch = db.next_pending_sitemaps(site_cfg.key, limit=limit)
+            if not batch:
+                break
 
-            db.set_sitemap_status(site_cfg.key, next_url, "done", item_count=item_count, error=None)
-            db.commit()
-            processed += 1
-            logger.info(
-                f"{site_cfg.key} sitemap done: {next_url} (locs={item_count}, nested={nested}, queued={leaf})"
+            if pool is None:
+                fetches = [lambda url=url: client.get_bytes(url) for url in batch]
+            else:
+                fetches = [pool.submit(paced_get_bytes, url).result for url in batch]
+            for next_url, fetch in zip(batch, fetches):
+                crawl_sitemap(db, site_cfg, logger, next_url, fetch)
+                processed += 1
+                if pool is None and delay_max > 0:
+                    time.sleep(random.uniform(delay_min, delay_max))
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    db.commit()
+    return processed
+
+
+def crawl_page(
+    db: IndexDb,
+    site_cfg: SiteConfig,
+    logger: LogWriter,
+    row: sqlite3.Row,
+    fetch: Callable[[], Tuple[str, Dict[str, str]]],
+    max_depth: int,
+    discover_links: bool,
+) -> bool:
+    """
+    Fetch one queued URL via fetch(), store the result and record its status.
+    Returns False for a block page (the caller skips the politeness delay then).
+    """
+    site_key = site_cfg.key
+    url = str(row["url"])
+    url_type = str(row["url_type"])
+    depth = int(row["depth"])
+
+    try:
+        page_html, headers = fetch()
+        blocked = detect_block_page(page_html)
+        http_status = 200
+        if blocked:
+            db.set_url_status(site_key, url, "blocked", http_status=http_status, blocked=True, error="captcha_or_block")
+            db.commit_batch()
+            logger.warn(f"{site_key} blocked: {url}")
+            return False
+
+        found_sku = None
+        found_title = None
+        found_category = None
+        if url_type == "product":
+            parsed = parse_product(site_key, page_html, url)
+            found_sku = clean_text(parsed.get("sku"), upper=True)
+            found_title = clean_text(parsed.get("title"))
+            found_category = clean_text(parsed.get("category_path"))
+            db.upsert_product(
+                site_key,
+                url,
+                found_sku,
+                found_title,
+                found_category,
+                payload={"headers": headers, "url_type": url_type},
             )
-        except Exception as exc:
-            db.set_sitemap_status(site_cfg.key, next_url, "error", item_count=None, error=safe_exc(exc))
-            db.commit()
-            logger.warn(f"{site_cfg.key} sitemap error: {next_url} :: {safe_exc(exc)}")
 
-        if delay_max > 0:
-            time.sleep(random.uniform(delay_min, delay_max))
+        if discover_links and depth < max_depth:
+            # extract_links already dedupes, so filter, classify and enqueue the page's links in one pass.
+            # Locals for the per-link loop: classify_url() is just the cached lookup by site key.
+            base_url = site_cfg.base_url
+            link_depth = depth + 1
+            link_rows: List[Tuple[str, str, int, Optional[str]]] = []
+            for link in extract_links(page_html, url):
+                if not link.startswith(base_url):
+                    continue
+                link_type = _classify_url_cached(site_key, link)
+                if link_type in ENQUEUABLE_URL_TYPES:
+                    link_rows.append((link, link_type, link_depth, url))
+            db.enqueue_urls_bulk(site_key, link_rows)
 
-    return processed
+        db.set_url_status(site_key, url, "done", http_status=http_status, blocked=False, error=None)
+        db.commit_batch()
+
+        if found_sku:
+            logger.info(f"{site_key} product ok: sku={found_sku} url={url}")
+        else:
+            logger.info(f"{site_key} page ok: type={url_type} depth={depth} url={url}")
+    except HTTPError as exc:
+        code = int(exc.code)
+        if code in {404, 410}:
+            db.set_url_status(site_key, url, "gone", http_status=code, blocked=False, error=f"HTTP {code}")
+            db.commit_batch()
+            logger.info(f"{site_key} gone ({code}): {url}")
+        else:
+            db.set_url_status(site_key, url, "error", http_status=code, blocked=False, error=safe_exc(exc))
+            db.commit_batch()
+            logger.warn(f"{site_key} HTTP error {code}: {url}")
+    except Exception as exc:
+        db.set_url_status(site_key, url, "error", http_status=None, blocked=False, error=safe_exc(exc))
+        db.commit_batch()
+        logger.warn(f"{site_key} page error: {url} :: {safe_exc(exc)}")
+
+    return True
 
 
 def crawl_urls(
@@ -939,95 +1279,161 @@ def crawl_urls(
     max_pages: Optional[int],
     max_depth: int,
     discover_links: bool,
+    concurrency: int = 1,
 ) -> int:
-    for seed in site_cfg.seed_category_urls:
-        db.enqueue_url(site_cfg.key, strip_query_and_fragment(seed), "category", depth=0, discovered_from="seed")
+    db.enqueue_urls_bulk(
+        site_cfg.key,
+        [(strip_query_and_fragment(seed), "category", 0, "seed") for seed in site_cfg.seed_category_urls],
+    )
     db.commit()
 
     processed = 0
-    allowed_types = ("product", "category")
-
-    while True:
-        if max_pages is not None and processed >= max_pages:
-            break
 
-        row = db.next_pending_url(site_cfg.key, allowed_types=allowed_types, max_depth=max_depth)
-        if not row:
-            break
-
-        url = str(row["url"])
-        url_type = str(row["url_type"])
-        depth = int(row["depth"])
+    if concurrency <= 1:
+        # Pending rows are read PENDING_URL_WINDOW at a time instead of one SELECT per page. Only
+        # rows at the window's lowest depth are kept: links found meanwhile are one level deeper,
+        # so this visits URLs in the same order as re-querying after every page.
+        window: Deque[sqlite3.Row] = deque()
+        while True:
+            if max_pages is not None and processed >= max_pages:
+                break
+
+            if not window:
+                limit = PENDING_URL_WINDOW if max_pages is None else min(PENDING_URL_WINDOW, max_pages - processed)
+                rows = db.next_pending_urls(site_cfg.key, allowed_types=CRAWL_URL_TYPES, max_depth=max_depth, limit=limit)
+                if not rows:
+                    break
+                window.extend(takewhile(lambda r: r["depth"] == rows[0]["depth"], rows))
+            row = window.popleft()
 
-        try:
-            page_html, headers = client.get_text(url)
-            blocked = detect_block_page(page_html)
-            http_status = 200
-            if blocked:
-                db.set_url_status(site_cfg.key, url, "blocked", http_status=http_status, blocked=True, error="captcha_or_block")
-                db.commit()
-                logger.warn(f"{site_cfg.key} blocked: {url}")
-                processed += 1
-                continue
+            url = str(row["url"])
+            polite = crawl_page(db, site_cfg, logger, row, lambda: client.get_text(url), max_depth, discover_links)
+            processed += 1
 
-            found_sku = None
-            found_title = None
-            found_category = None
-            if url_type == "product":
-                parsed = parse_product(site_cfg.key, page_html, url)
-                found_sku = normalize_space(str(parsed.get("sku", "") or "")).upper() or None
-                found_title = normalize_space(str(parsed.get("title", "") or "")) or None
-                found_category = normalize_space(str(parsed.get("category_path", "") or "")) or None
-                db.upsert_product(
+            if polite and delay_max > 0:
+                time.sleep(random.uniform(delay_min, delay_max))
+
+        db.commit()
+        return processed
+
+    # Keep up to `concurrency` fetches in flight and top the window up as each one finishes,
+    # so one slow page does not hold back the rest. URLs stay 'pending' while in flight,
+    # hence the skip against in_flight_urls when claiming. Results are stored on this thread.
+    # Fetch starts are paced so the host sees on average `concurrency` requests per delay window.
+    pacer = RequestPacer(delay_min / concurrency, delay_max / concurrency)
+
+    def paced_get_text(url: str) -> Tuple[str, Dict[str, str]]:
+        pacer.wait()
+        return client.get_text(url)
+
+    in_flight: Dict[Future[Tuple[str, Dict[str, str]]], sqlite3.Row] = {}
+    in_flight_urls = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            free = concurrency - len(in_flight)
+            if max_pages is not None:
+                free = min(free, max_pages - processed - len(in_flight))
+            if free > 0:
+                rows = db.next_pending_urls(
                     site_cfg.key,
-                    url,
-                    found_sku,
-                    found_title,
-                    found_category,
-                    payload={"headers": headers, "url_type": url_type},
+                    allowed_types=CRAWL_URL_TYPES,
+                    max_depth=max_depth,
+                    limit=len(in_flight) + free,
                 )
-
-            if discover_links and depth < max_depth:
-                links = extract_links(page_html, url)
-                for link in links:
-                    if not link.startswith(site_cfg.base_url):
+                for row in rows:
+                    url = str(row["url"])
+                    if url in in_flight_urls:
                         continue
-                    link_type = classify_url(site_cfg, link)
-                    if link_type in {"product", "category"}:
-                        db.enqueue_url(site_cfg.key, link, link_type, depth=depth + 1, discovered_from=url)
+                    in_flight[pool.submit(paced_get_text, url)] = row
+                    in_flight_urls.add(url)
+                    free -= 1
+                    if free <= 0:
+                        break
 
-            db.set_url_status(site_cfg.key, url, "done", http_status=http_status, blocked=False, error=None)
-            db.commit()
-            processed += 1
+            if not in_flight:
+                break
 
-            if found_sku:
-                logger.info(f"{site_cfg.key} product ok: sku={found_sku} url={url}")
-            else:
-                logger.info(f"{site_cfg.key} page ok: type={url_type} depth={depth} url={url}")
-        except HTTPError as exc:
-            code = int(exc.code)
-            if code in {404, 410}:
-                db.set_url_status(site_cfg.key, url, "gone", http_status=code, blocked=False, error=f"HTTP {code}")
-                db.commit()
-                processed += 1
-                logger.info(f"{site_cfg.key} gone ({code}): {url}")
-            else:
-                db.set_url_status(site_cfg.key, url, "error", http_status=code, blocked=False, error=safe_exc(exc))
-                db.commit()
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                row = in_flight.pop(future)
+                in_flight_urls.discard(str(row["url"]))
+                crawl_page(db, site_cfg, logger, row, future.result, max_depth, discover_links)
                 processed += 1
-                logger.warn(f"{site_cfg.key} HTTP error {code}: {url}")
-        except Exception as exc:
-            db.set_url_status(site_cfg.key, url, "error", http_status=None, blocked=False, error=safe_exc(exc))
-            db.commit()
-            processed += 1
-            logger.warn(f"{site_cfg.key} page error: {url} :: {safe_exc(exc)}")
-
-        if delay_max > 0:
-            time.sleep(random.uniform(delay_min, delay_max))
 
+    db.commit()
     return processed
 
 
+def crawl_site(
+    db: IndexDb,
+    client: SimpleHttpClient,
+    cfg: SiteConfig,
+    logger: LogWriter,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    """Crawl one site's sitemaps and pages; returns its final db.stats() for the summary."""
+    site_key = cfg.key
+    logger.info(f"=== START {site_key} ===")
+
+    if args.retry_errors:
+        reset = db.reset_errors(site_key)
+        db.commit()
+        logger.info(f"{site_key} reset error/blocked -> pending: {reset}")
+
+    sitemaps_done = crawl_sitemaps(
+        db=db,
+        client=client,
+        site_cfg=cfg,
+        logger=logger,
+        delay_min=args.delay_min,
+        delay_max=args.delay_max,
+        max_sitemaps=args.max_sitemaps,
+        concurrency=args.concurrency,
+    )
+    logger.info(f"{site_key} sitemaps processed: {sitemaps_done}")
+    db.analyze()
+
+    pages_done = crawl_urls(
+        db=db,
+        client=client,
+        site_cfg=cfg,
+        logger=logger,
+        delay_min=args.delay_min,
+        delay_max=args.delay_max,
+        max_pages=args.max_pages,
+        max_depth=args.max_depth,
+        discover_links=not args.no_discover_links,
+        concurrency=args.concurrency,
+    )
+    logger.info(f"{site_key} pages processed: {pages_done}")
+
+    stats = db.stats(site_key)
+    logger.info(f"{site_key} stats: {json.dumps(stats, ensure_ascii=False)}")
+    return stats
+
+
+def crawl_site_own_db(
+    db_path: Path,
+    client: SimpleHttpClient,
+    cfg: SiteConfig,
+    logger: LogWriter,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    """
+    crawl_site() on a connection of its own, for --parallel-sites (sqlite3 connections stay in one thread).
+    batch_size=1 commits after every sitemap/page, so no write transaction is left open while the next
+    fetch (timeouts, retries, Retry-After) runs and the other site's writes never wait on the network.
+    """
+    db = IndexDb(db_path, batch_size=1)
+    try:
+        return crawl_site(db, client, cfg, logger, args)
+    finally:
+        try:
+            db.commit()
+        finally:
+            db.close()
+
+
 def run_crawl(args: argparse.Namespace) -> int:
     db = IndexDb(Path(args.db_path))
     logger = LogWriter(Path(args.log_path), verbose=args.verbose)
@@ -1041,42 +1447,22 @@ def run_crawl(args: argparse.Namespace) -> int:
 
     selected_sites = ["twinset.ru", "twinset.com"] if args.site == "both" else [args.site]
 
+    # Each site's stats are final once its crawl returns, so the summary reuses them.
+    stats_by_site: Dict[str, Dict[str, Any]] = {}
     try:
-        for site_key in selected_sites:
-            cfg = SITE_CONFIGS[site_key]
-            logger.info(f"=== START {site_key} ===")
-
-            if args.retry_errors:
-                reset = db.reset_errors(site_key)
-                db.commit()
-                logger.info(f"{site_key} reset error/blocked -> pending: {reset}")
-
-            sitemaps_done = crawl_sitemaps(
-                db=db,
-                client=client,
-                site_cfg=cfg,
-                logger=logger,
-                delay_min=args.delay_min,
-                delay_max=args.delay_max,
-                max_sitemaps=args.max_sitemaps,
-            )
-            logger.info(f"{site_key} sitemaps processed: {sitemaps_done}")
-
-            pages_done = crawl_urls(
-                db=db,
-                client=client,
-                site_cfg=cfg,
-                logger=logger,
-                delay_min=args.delay_min,
-                delay_max=args.delay_max,
-                max_pages=args.max_pages,
-                max_depth=args.max_depth,
-                discover_links=not args.no_discover_links,
-            )
-            logger.info(f"{site_key} pages processed: {pages_done}")
-
-            stats = db.stats(site_key)
-            logger.info(f"{site_key} stats: {json.dumps(stats, ensure_ascii=False)}")
+        if args.parallel_sites and len(selected_sites) > 1:
+            # Different hosts, so each site keeps its own pacing; only the SQLite writer lock is shared.
+            with ThreadPoolExecutor(max_workers=len(selected_sites)) as pool:
+                db_path = Path(args.db_path)
+                futures = {
+                    site_key: pool.submit(crawl_site_own_db, db_path, client, SITE_CONFIGS[site_key], logger, args)
+                    for site_key in selected_sites
+                }
+                for site_key, future in futures.items():
+                    stats_by_site[site_key] = future.result()
+        else:
+            for site_key in selected_sites:
+                stats_by_site[site_key] = crawl_site(db, client, SITE_CONFIGS[site_key], logger, args)
 
         exports = db.export_csv(Path(args.export_dir))
         summary = {
@@ -1085,10 +1471,7 @@ def run_crawl(args: argparse.Namespace) -> int:
             "db_path": str(Path(args.db_path).resolve()),
             "log_path": str(Path(args.log_path).resolve()),
             "exports": exports,
-            "stats": {
-                key: db.stats(key)
-                for key in (["twinset.ru", "twinset.com"] if args.site == "both" else [args.site])
-            },
+            "stats": stats_by_site,
         }
         summary_path = Path(args.export_dir) / "crawl_summary.json"
         summary_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -1097,7 +1480,13 @@ def run_crawl(args: argparse.Namespace) -> int:
         print(json.dumps(summary, ensure_ascii=False, indent=2))
         return 0
     finally:
-        db.close()
+        # Keep whatever the current batch has done if the crawl is interrupted.
+        try:
+            db.commit()
+        finally:
+            db.close()
+            client.close()
+            logger.close()
 
 
 def run_match(args: argparse.Namespace) -> int:
@@ -1120,6 +1509,7 @@ def run_match(args: argparse.Namespace) -> int:
         return 0
     finally:
         db.close()
+        logger.close()
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -1138,6 +1528,17 @@ def build_parser() -> argparse.ArgumentParser:
     crawl.add_argument("--retry-errors", action="store_true", help="Requeue error/blocked URLs")
     crawl.add_argument("--timeout", type=float, default=35.0)
     crawl.add_argument("--retries", type=int, default=3)
+    crawl.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Page/sitemap fetches kept in flight (default 1 = serial, polite)",
+    )
+    crawl.add_argument(
+        "--parallel-sites",
+        action="store_true",
+        help="With --site both, crawl twinset.ru and twinset.com at the same time",
+    )
     crawl.add_argument("--delay-min", type=float, default=0.7)
     crawl.add_argument("--delay-max", type=float, default=1.8)
     crawl.add_argument("--user-agent", default=DEFAULT_UA)